@@ -0,0 +1,106 @@
+"""Times the queries behind the order and product listings on a generated dataset, without and with
+the indexes declared in app/models.py. Runs against an in-memory SQLite database by default, pass a
+database URL as the first argument to run it against e.g. a scratch MySQL schema.
+
+    python benchmarks/bench_indexes.py [database_url] [orders]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.orm import Session
+
+from app.db import db
+from app.models import Customer, Order, OrderDetails, Product
+
+
+CUSTOMERS = 2000
+PRODUCTS = 500
+CATEGORIES = 10
+DETAILS_PER_ORDER = 4
+COUNTRIES = ["Germany", "France", "USA", "UK", "Brazil", "Spain", "Italy", "Mexico", "Canada", "Sweden"]
+
+
+def generate(engine, order_count: int) -> None:
+    random.seed(42)
+    start_date = datetime(1996, 7, 4)
+    with engine.begin() as connection:
+        connection.execute(insert(Customer), [
+            {"customer_id": f"C{index:05}", "company_name": f"Company {index}"} for index in range(CUSTOMERS)
+        ])
+        connection.execute(insert(Product), [
+            {"product_id": index, "product_name": f"Product {index}", "quantity_per_unit": "1",
+             "category_id": index % CATEGORIES + 1, "unit_price": 10.0, "discontinued": 0}
+            for index in range(1, PRODUCTS + 1)
+        ])
+        for chunk_start in range(1, order_count + 1, 10000):
+            order_ids = range(chunk_start, min(chunk_start + 10000, order_count + 1))
+            connection.execute(insert(Order), [
+                {"order_id": order_id, "customer_id": f"C{random.randrange(CUSTOMERS):05}", "ship_via": 1,
+                 "order_date": start_date + timedelta(minutes=random.randrange(60 * 24 * 365 * 3)),
+                 "ship_country": random.choice(COUNTRIES)}
+                for order_id in order_ids
+            ])
+            connection.execute(insert(OrderDetails), [
+                {"order_id": order_id, "product_id": product_id, "unit_price": 10.0, "quantity": 1, "discount": 0.0}
+                for order_id in order_ids
+                for product_id in random.sample(range(1, PRODUCTS + 1), DETAILS_PER_ORDER)
+            ])
+
+
+QUERIES = {
+    "customer orders page (customer_id, order_date)":
+        select(Order).where(Order.customer_id == "C00042").order_by(Order.order_date, Order.order_id).limit(15),
+    "orders in a date range (order_date)":
+        select(func.count()).select_from(Order).where(
+            Order.order_date.between(datetime(1997, 1, 1), datetime(1997, 1, 8))),
+    "orders shipped to a country (ship_country)":
+        select(Order.order_id).where(Order.ship_country == "Sweden").order_by(Order.order_id).limit(100),
+    "order lines of a product (order_details.product_id)":
+        select(func.count()).select_from(OrderDetails).where(OrderDetails.product_id == 7),
+    "products of a category (products.category_id)":
+        select(Product).where(Product.category_id == 3).order_by(Product.product_id).limit(10),
+}
+
+
+def time_queries(engine, repeat: int = 20):
+    timings = {}
+    with Session(engine) as session:
+        for name, statement in QUERIES.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                session.execute(statement).all()
+            timings[name] = (time.perf_counter() - started) / repeat * 1000
+    return timings
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "sqlite://"
+    order_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    indexes = [index for table in db.metadata.sorted_tables for index in table.indexes]
+    for index in indexes:
+        index.drop(engine)
+
+    print(f"generating {order_count} orders with {DETAILS_PER_ORDER} lines each")
+    generate(engine, order_count)
+    without_indexes = time_queries(engine)
+    for index in indexes:
+        index.create(engine)
+    with_indexes = time_queries(engine)
+
+    print(f"{'query':<52} {'without (ms)':>14} {'with (ms)':>12}")
+    for name in QUERIES:
+        print(f"{name:<52} {without_indexes[name]:>14.3f} {with_indexes[name]:>12.3f}")
+
+    db.metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
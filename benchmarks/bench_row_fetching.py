@@ -0,0 +1,79 @@
+"""Compares the ORM listing path (`Customer.query...all()` and `to_dict()`) with the read-only Core path
+of the repositories (`select(*columns)` rows and the generated serializers) for throughput and peak
+memory. Runs against an in-memory SQLite database by default, pass a database URL as the first argument
+to run it against e.g. a scratch MySQL schema.
+
+    python benchmarks/bench_row_fetching.py [database_url] [customers]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.db import db
+from app.models import Customer
+from app.projection import project_all
+from app.repositories import customer_repository
+
+
+def orm_listing(page_size: int):
+    customers = Customer.query.limit(page_size).offset(0).all()
+    return [customer.to_dict() for customer in customers]
+
+
+def core_listing(page_size: int):
+    return project_all(Customer, customer_repository.get_customers(1, page_size), None)
+
+
+LISTINGS = {"ORM instances + to_dict()": orm_listing, "Core rows + serializer": core_listing}
+
+
+def measure(listing, page_size: int, repeat: int):
+    db.session.remove()
+    listing(page_size)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        listing(page_size)
+        # every request starts with an empty session
+        db.session.remove()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    listing(page_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.remove()
+    return page_size * repeat / elapsed, peak / 1024
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "sqlite://"
+    customer_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    app = create_app({"SQLALCHEMY_DATABASE_URI": url})
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Customer), [
+            {"customer_id": f"C{index:06}", "company_name": f"Company {index}", "contact_name": f"Contact {index}",
+             "city": "Berlin", "country": "Germany", "phone": "030-0074321"}
+            for index in range(customer_count)
+        ])
+        db.session.commit()
+
+        print(f"{'listing':<28} {'page size':>10} {'rows/s':>12} {'peak KiB':>10}")
+        for page_size in (15, 1000, customer_count):
+            repeat = max(1, 20000 // page_size)
+            for name, listing in LISTINGS.items():
+                throughput, peak = measure(listing, page_size, repeat)
+                print(f"{name:<28} {page_size:>10} {throughput:>12.0f} {peak:>10.0f}")
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
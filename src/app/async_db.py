@@ -0,0 +1,83 @@
+import asyncio
+import logging as root_logger
+import os
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from flask import Flask, current_app
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app import query_stats
+
+
+logger = root_logger.getLogger("northwind")
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT = 30.0
+
+
+def async_engine_options(config) -> dict:
+    if config["ASYNC_DATABASE_URI"].startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+    }
+
+
+class AsyncDatabase:
+    """Async engine of the ASGI read application, used from the event loop of the ASGI server. Queries
+    await their connection and their rows on that loop, so a worker serves as many concurrent reads as
+    its pool has connections, not as many as it has threads."""
+
+    def __init__(self, url: str, engine_options: dict, timeout: float = DEFAULT_TIMEOUT,
+                 slow_query_threshold: Optional[float] = None):
+        self.url = url
+        self.engine_options = engine_options
+        self.timeout = timeout
+        # seconds, the statements are recorded in the query stats unless None
+        self.slow_query_threshold = slow_query_threshold
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory = None
+
+    def _sessions(self):
+        # created on first use, from the loop of the (forked) server process which then owns its connections
+        if self._session_factory is None:
+            self._engine = create_async_engine(self.url, **self.engine_options)
+            if self.slow_query_threshold is not None:
+                query_stats.listen(self._engine.sync_engine, self.slow_query_threshold)
+            self._session_factory = async_sessionmaker(self._engine, expire_on_commit=False)
+            logger.info("Created async engine for process %s", os.getpid())
+        return self._session_factory
+
+    async def run(self, query: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        """Runs `query` with a new session. A query still running after `timeout` seconds is cancelled,
+        which closes its session and gives its connection back to the pool."""
+        async def with_session():
+            async with self._sessions()() as session:
+                return await query(session)
+
+        return await asyncio.wait_for(with_session(), self.timeout)
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine, self._session_factory = None, None
+
+
+def init_app(app: Flask) -> None:
+    if not app.config["ASYNC_DATABASE_URI"]:
+        raise RuntimeError("ASYNC_DATABASE_URI is not set, set NORTHWIND_ASYNC_DATABASE_URI (e.g. "
+                           "mysql+aiomysql://...) to serve the /v1/async endpoints")
+    app.extensions["northwind_async_db"] = AsyncDatabase(
+        app.config["ASYNC_DATABASE_URI"],
+        async_engine_options(app.config),
+        app.config["ASYNC_QUERY_TIMEOUT"],
+        app.config["SLOW_QUERY_THRESHOLD_MS"] / 1000 if app.config["QUERY_STATS_ENABLED"] else None)
+
+
+def get_async_db() -> AsyncDatabase:
+    return current_app.extensions["northwind_async_db"]
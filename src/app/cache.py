@@ -0,0 +1,189 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from flask import Flask, current_app, has_app_context
+
+
+MISSING = object()
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 300.0
+
+
+class _Counters:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class LRUCache:
+    """In-process cache bounded by `max_size` entries, each entry living at most `ttl` seconds."""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: float = DEFAULT_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.counters = _Counters()
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Any:
+        key = str(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.counters.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.counters.hits += 1
+            return entry[1]
+
+    def set(self, key, value) -> None:
+        key = str(key)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.counters.evictions += 1
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._entries.pop(str(key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "local", "size": len(self._entries), "max_size": self.max_size, **self.counters.to_dict()}
+
+
+class LocalSharedBackend:
+    """Stand-in for a shared key/value store (same get/set/delete interface as a redis client),
+    used when no shared client is configured, e.g. in development."""
+
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._values.pop(key, None)
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> None:
+        with self._lock:
+            self._values[key] = (time.monotonic() + ex if ex else float("inf"), value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+
+
+class SharedCache:
+    """Cache stored in a key/value store shared by all processes. Values are stored as JSON."""
+
+    def __init__(self, name: str, client, ttl: float = DEFAULT_TTL):
+        self.prefix = f"northwind:{name}:"
+        self.client = client
+        self.ttl = ttl
+        self.counters = _Counters()
+        self._known_keys = set()
+
+    def get(self, key) -> Any:
+        value = self.client.get(self.prefix + str(key))
+        if value is None:
+            self.counters.misses += 1
+            return MISSING
+        self.counters.hits += 1
+        return json.loads(value)
+
+    def set(self, key, value) -> None:
+        self._known_keys.add(str(key))
+        self.client.set(self.prefix + str(key), json.dumps(value).encode("utf-8"), ex=int(self.ttl))
+
+    def delete(self, key) -> None:
+        self._known_keys.discard(str(key))
+        self.client.delete(self.prefix + str(key))
+
+    def clear(self) -> None:
+        for key in list(self._known_keys):
+            self.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "shared", **self.counters.to_dict()}
+
+
+class NullCache:
+    """Used outside of an application context, nothing is ever cached."""
+
+    def get(self, key) -> Any:
+        return MISSING
+
+    def set(self, key, value) -> None:
+        pass
+
+    def delete(self, key) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "none"}
+
+
+def _create_cache(name: str, config):
+    ttl = config.get("CACHE_TTL", DEFAULT_TTL)
+    backend = config.get("CACHE_BACKEND", "local")
+    if backend == "none":
+        return NullCache()
+    if backend == "shared":
+        return SharedCache(name, config["CACHE_SHARED_CLIENT"], ttl)
+    if backend == "local":
+        return LRUCache(config.get("CACHE_MAX_SIZE", DEFAULT_MAX_SIZE), ttl)
+    raise ValueError(f"Unknown cache backend {backend}")
+
+
+def init_app(app: Flask) -> None:
+    """Read-through caches of the app. CACHE_BACKEND is `local` (per-process LRU, the default),
+    `shared` (CACHE_SHARED_CLIENT, a redis-like client, defaults to a local stand-in) or `none`."""
+    if app.config.get("CACHE_BACKEND") == "shared":
+        app.config.setdefault("CACHE_SHARED_CLIENT", LocalSharedBackend())
+    app.extensions["northwind_cache"] = {"caches": {}, "lock": threading.Lock()}
+
+
+def get_cache(name: str):
+    if not has_app_context() or "northwind_cache" not in current_app.extensions:
+        return NullCache()
+
+    state = current_app.extensions["northwind_cache"]
+    cache = state["caches"].get(name)
+    if cache is None:
+        with state["lock"]:
+            cache = state["caches"].setdefault(name, _create_cache(name, current_app.config))
+    return cache
+
+
+def invalidate(name: str, keys: Iterable) -> None:
+    cache = get_cache(name)
+    for key in keys:
+        cache.delete(key)
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    if not has_app_context() or "northwind_cache" not in current_app.extensions:
+        return {}
+    return {name: cache.stats() for name, cache in current_app.extensions["northwind_cache"]["caches"].items()}
@@ -0,0 +1,12 @@
+import click
+from flask import Flask
+
+from app.services import sales_rollup_service
+
+
+def init_app(app: Flask) -> None:
+    @app.cli.command("rebuild-sales-rollups")
+    def rebuild_sales_rollups():
+        """Recomputes the sales rollups from every order, e.g. after loading data outside of the API."""
+        row_count = sales_rollup_service.rebuild()
+        click.echo(f"Rebuilt {row_count} sales rollup rows")
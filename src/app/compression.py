@@ -0,0 +1,131 @@
+import logging as root_logger
+import time
+import zlib
+from typing import Callable, Iterable, Iterator, Optional
+
+from flask import Flask, Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+logger = root_logger.getLogger("northwind")
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-ndjson", "text/plain", "text/html")
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        # emits everything compressed so far, so a streamed client is not kept waiting for a full block
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _choose_encoding() -> Optional[str]:
+    accept_encodings = request.accept_encodings
+    gzip_quality = accept_encodings.quality("gzip")
+    if brotli is not None:
+        brotli_quality = accept_encodings.quality("br")
+        if brotli_quality > 0 and brotli_quality >= gzip_quality:
+            return "br"
+    return "gzip" if gzip_quality > 0 else None
+
+
+def _encoder_factory(encoding: str) -> Callable:
+    if encoding == "br":
+        quality = current_app.config["COMPRESS_BROTLI_QUALITY"]
+        return lambda: _BrotliEncoder(quality)
+    level = current_app.config["COMPRESS_LEVEL"]
+    return lambda: _GzipEncoder(level)
+
+
+def _compress_stream(chunks: Iterable[bytes], encoder, flush_size: int, flush_interval: float) -> Iterator[bytes]:
+    # a flush ends the compressed block, flushing after every small chunk (e.g. an NDJSON line) would
+    # nearly double the output, so chunks are only flushed once flush_size bytes or flush_interval
+    # seconds have gone by since the last flush
+    pending = 0
+    flushed_at = time.monotonic()
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            compressed = encoder.compress(chunk)
+            pending += len(chunk)
+            if pending >= flush_size or time.monotonic() - flushed_at >= flush_interval:
+                compressed += encoder.flush()
+                pending = 0
+                flushed_at = time.monotonic()
+            if compressed:
+                yield compressed
+        yield encoder.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_response(response: Response) -> Response:
+    """Compresses JSON and text responses with the encoding the client prefers in Accept-Encoding,
+    brotli when it is installed or gzip. Bodies smaller than COMPRESS_MIN_SIZE are sent as they are,
+    streamed bodies are compressed chunk by chunk whatever their size."""
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    new_encoder = _encoder_factory(encoding)
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, new_encoder(),
+                                              current_app.config["COMPRESS_STREAM_FLUSH_SIZE"],
+                                              current_app.config["COMPRESS_STREAM_FLUSH_INTERVAL"])
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+            return response
+        encoder = new_encoder()
+        response.set_data(encoder.compress(data) + encoder.finish())
+        logger.debug("compressed response from %s to %s bytes with %s", len(data), response.content_length, encoding)
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # the compressed body is a different representation of the same resource
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    if app.config["COMPRESS_ENABLED"]:
+        app.after_request(compress_response)
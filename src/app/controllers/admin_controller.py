@@ -0,0 +1,23 @@
+import logging
+
+from flask import Blueprint
+
+from app import cache
+from app.db import db
+from app.pool_stats import pool_stats
+
+
+admin_bp = Blueprint("admin", __name__)
+logger = logging.getLogger("northwind")
+
+
+@admin_bp.get("/cache")
+def get_cache_stats():
+    return cache.stats()
+
+
+@admin_bp.get("/pool")
+def get_pool_stats():
+    stats = pool_stats(db.engine)
+    logger.info("Connection pool stats", extra={"pool": stats})
+    return stats
@@ -0,0 +1,164 @@
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Pattern, Tuple
+from urllib.parse import parse_qsl
+
+from flask import Flask
+
+from app import async_db, query_stats
+from app.exceptions import *
+from app.services import async_read_service
+
+
+logger = logging.getLogger("northwind")
+
+URL_PREFIX = "/v1/async"
+
+
+async def get_all_customers(args: Dict[str, str]):
+    page = args.get("page", "1")
+    try:
+        return await async_read_service.get_all_customers(page)
+    except InvalidPageException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while getting all customers with page %s", page)
+        return {"error": "something went wrong"}, 500
+
+
+async def get_customer(args: Dict[str, str], customer_id: str):
+    try:
+        return await async_read_service.get_customer(customer_id)
+    except ResourceNotFoundException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while fetching customer information with customer_id %s", customer_id)
+        return {"error": "something went wrong"}, 500
+
+
+async def get_customer_orders(args: Dict[str, str], customer_id: str):
+    page = args.get("page", "1")
+    try:
+        return await async_read_service.get_customer_orders(customer_id, page)
+    except (InvalidPageException, ResourceNotFoundException) as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while fetching customer %s orders for page %s", customer_id, page)
+        return {"error": "something went wrong"}, 500
+
+
+async def get_all_products(args: Dict[str, str]):
+    page = args.get("page", "1")
+    try:
+        return await async_read_service.get_all_products(page)
+    except InvalidPageException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while getting all products with page %s", page)
+        return {"error": "something went wrong"}, 500
+
+
+async def get_product(args: Dict[str, str], product_id: str):
+    try:
+        return await async_read_service.get_product(int(product_id))
+    except ResourceNotFoundException as e:
+        return {"error": e.msg}, 404
+    except Exception:
+        logger.exception("Something went wrong while fetching product %s", product_id)
+        return {"error": "something went wrong"}, 500
+
+
+async def get_all_orders(args: Dict[str, str]):
+    page = args.get("page", "1")
+    try:
+        return await async_read_service.get_all_orders(page)
+    except InvalidPageException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while getting all orders with page %s", page)
+        return {"error": "something went wrong"}, 500
+
+
+async def get_order(args: Dict[str, str], order_id: str):
+    try:
+        return await async_read_service.get_order(int(order_id))
+    except ResourceNotFoundException as e:
+        return {"error": e.msg}, 404
+    except Exception:
+        logger.exception("Something went wrong while fetching order %s", order_id)
+        return {"error": "something went wrong"}, 500
+
+
+# GET routes below URL_PREFIX, the groups of the pattern are passed to the view after the query arguments
+ROUTES: List[Tuple[Pattern, Callable[..., Awaitable[Any]]]] = [
+    (re.compile(r"/customers/"), get_all_customers),
+    (re.compile(r"/customers/([^/]+)"), get_customer),
+    (re.compile(r"/customers/([^/]+)/orders"), get_customer_orders),
+    (re.compile(r"/products/"), get_all_products),
+    (re.compile(r"/products/(\d+)"), get_product),
+    (re.compile(r"/orders/"), get_all_orders),
+    (re.compile(r"/orders/(\d+)"), get_order),
+]
+
+
+class AsyncReadApp:
+    """ASGI application serving the read endpoints under /v1/async, e.g. with `uvicorn asgi:app`. The
+    views await the async engine on the server's event loop instead of holding a thread per request.
+    `flask_app` provides the configuration, the JSON provider, the caches and the reference data."""
+
+    def __init__(self, flask_app: Flask):
+        self.flask_app = flask_app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        body, status, server_timing = await self._dispatch(scope)
+        data = self.flask_app.json.dumps(body).encode("utf-8")
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(data)).encode("ascii")),
+        ]
+        headers.extend((b"server-timing", value.encode("latin-1")) for value in server_timing)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": data})
+
+    async def _dispatch(self, scope) -> Tuple[Any, int, List[str]]:
+        path = scope["path"]
+        if not path.startswith(URL_PREFIX + "/"):
+            return {"error": "not found"}, 404, []
+        for pattern, view in ROUTES:
+            match = pattern.fullmatch(path[len(URL_PREFIX):])
+            if match is None:
+                continue
+            if scope["method"] != "GET":
+                return {"error": "method not allowed"}, 405, []
+            args = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+            # an app context per request, the context variables it sets are local to the request's task
+            with self.flask_app.app_context():
+                stats = query_stats.begin() if self.flask_app.config["QUERY_STATS_ENABLED"] else None
+                result = await view(args, *match.groups())
+                server_timing = query_stats.finish(stats, "GET", path) if stats is not None else []
+            body, status = result if isinstance(result, tuple) else (result, 200)
+            return body, status, server_timing
+        return {"error": "not found"}, 404, []
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                with self.flask_app.app_context():
+                    try:
+                        await async_read_service.refresh_reference_data()
+                    except Exception:
+                        # loaded by the first request needing it instead
+                        logger.exception("Could not preload the reference data")
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                with self.flask_app.app_context():
+                    await async_db.get_async_db().dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
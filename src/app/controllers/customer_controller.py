@@ -1,8 +1,9 @@
 import logging
 
-from flask import Blueprint, request
+from flask import Blueprint, current_app, request
 from app.exceptions import *
-from app.services import customer_service
+from app.http_cache import conditional_json
+from app.services import bulk_service, customer_service
 
 
 customer_bp = Blueprint("customers", __name__)
@@ -12,20 +13,33 @@ logger = logging.getLogger("northwind")
 @customer_bp.get("/")
 def get_all_customers():
     page = request.args.get("page", "1")
+    cursor = request.args.get("cursor")
     try:
-        return customer_service.get_all_customers(page)
-    except InvalidPageException as e:
+        return customer_service.get_all_customers(page, cursor=cursor, fields=request.args.get("fields"),
+                                                  filters=request.args, sort=request.args.get("sort"))
+    except (InvalidPageException, InvalidCursorException, ValidationException) as e:
         return {"error": e.msg}, 400
     except Exception:
         logger.exception("Something went wrong while getting all customers with page %s", page)
         return {"error": "something went wrong"}, 500
 
 
+@customer_bp.get("/search")
+def search_customers():
+    try:
+        return customer_service.search_customers(request.args.get("q"), request.args.get("limit", "10"))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while searching customers")
+        return {"error": "something went wrong"}, 500
+
+
 @customer_bp.get("/<customer_id>")
 def get_customer(customer_id):
     try:
-        return customer_service.get_customer(customer_id)
-    except (InvalidResourceIdException, ResourceNotFoundException) as e:
+        return conditional_json(customer_service.get_customer(customer_id, request.args.get("fields")))
+    except (InvalidResourceIdException, ResourceNotFoundException, ValidationException) as e:
         return {"error": e.msg}, 400
     except Exception:
         logger.exception("Something went wrong while fetching customer information with customer_id %s", customer_id)
@@ -45,6 +59,19 @@ def add_customer():
         return {"error": "something went wrong"}, 500
 
 
+@customer_bp.post("/bulk")
+def add_customers():
+    try:
+        payload = bulk_service.parse_payload(request.get_data(), request.mimetype)
+        upsert = request.args.get("upsert", "false").lower() == "true"
+        return customer_service.add_customers(payload, upsert, current_app.config.get("BULK_CHUNK_SIZE"))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while adding customers in bulk")
+        return {"error": "something went wrong"}, 500
+
+
 @customer_bp.patch("/<customer_id>")
 def update_customer(customer_id):
     try:
@@ -60,11 +87,23 @@ def update_customer(customer_id):
 @customer_bp.get("/<customer_id>/orders")
 def get_customer_orders(customer_id):
     page = request.args.get("page", "1")
+    cursor = request.args.get("cursor")
     try:
-        return customer_service.get_customer_orders(customer_id, page)
-    except (InvalidPageException, ResourceNotFoundException) as e:
+        return customer_service.get_customer_orders(customer_id, page, cursor=cursor, fields=request.args.get("fields"))
+    except (InvalidPageException, InvalidCursorException, ResourceNotFoundException, ValidationException) as e:
         return {"error": e.msg}, 400
     except Exception as e:
         logger.exception("Something went wrong while fetching customer %s orders for page %s", customer_id, page)
         return {"error": "something went wrong"}, 500
 
+
+@customer_bp.get("/<customer_id>/orders/summary")
+def get_customer_order_summary(customer_id):
+    try:
+        return conditional_json(customer_service.get_customer_order_summary(customer_id))
+    except ResourceNotFoundException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while summarizing customer %s orders", customer_id)
+        return {"error": "something went wrong"}, 500
+
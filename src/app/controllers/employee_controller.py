@@ -0,0 +1,24 @@
+import logging
+
+from flask import Blueprint
+
+from app.exceptions import ResourceNotFoundException
+from app.http_cache import conditional_bytes
+from app.services import employee_service
+
+
+employee_bp = Blueprint("employees", __name__)
+logger = logging.getLogger("northwind")
+
+
+@employee_bp.get("/<int:employee_id>/photo")
+def get_employee_photo(employee_id):
+    try:
+        photo, mimetype = employee_service.get_employee_photo(employee_id)
+    except ResourceNotFoundException as e:
+        return {"error": e.msg}, 404
+    except Exception:
+        logger.exception("Something went wrong while fetching the photo of employee %s", employee_id)
+        return {"error": "something went wrong"}, 500
+
+    return conditional_bytes(photo, mimetype)
@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+
+from app import metrics
+
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.get("/metrics")
+def get_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
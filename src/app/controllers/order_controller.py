@@ -1,106 +1,95 @@
-from datetime import datetime
-from sqlalchemy.orm import joinedload, selectinload
-from flask import Blueprint, request
+import logging
+from flask import Blueprint, Response, current_app, request, stream_with_context
 
+from app.exceptions import InvalidCursorException, ResourceNotFoundException, ValidationException
+from app.filtering import parse_filters, parse_sort
+from app.http_cache import conditional_json
 from app.models import Order
-from app.db import db
+from app.projection import parse_fields
+from app.repositories import order_repository
+from app.services import bulk_service, order_service
 
 
 order_bp = Blueprint("orders", __name__)
+logger = logging.getLogger("northwind")
 
 
 @order_bp.get("/")
 def get_all_orders():
-    page = int(request.args.get("page", 1))
-    if page <= 0:
-        return "invalid page", 400
-
-    orders = (Order.query.limit(10).offset((page - 1)  * 10)
-              .options(
-                selectinload(Order.customer),
-                selectinload(Order.employee),
-                selectinload(Order.shipper))
-              .all())
-    orders_dict = []
-    for order in orders:
-        order_dict = order.to_dict()
-        order_dict["customer"] = order.customer.to_dict() if order.customer else None
-        order_dict["employee"] = order.employee.to_dict() if order.employee else None
-        order_dict["shipper"] = order.shipper.to_dict() if order.shipper else None
-        order_dict["last_10_order_details"] = [order_detail.to_dict() for order_detail in order.order_details.limit(10).all()]
-        orders_dict.append(order_dict)
-
+    cursor = request.args.get("cursor")
+    try:
+        fields = parse_fields(Order, request.args.get("fields"))
+        filters = parse_filters(Order, request.args)
+        keys = parse_sort(Order, request.args.get("sort"))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    if cursor is not None:
+        try:
+            orders, next_cursor = order_repository.get_orders_after(cursor, 10, fields, filters, keys)
+        except InvalidCursorException as e:
+            return {"error": e.msg}, 400
+    else:
+        page = request.args.get("page", "1")
+        if not page.isdigit() or int(page) <= 0:
+            return "invalid page", 400
+        page = int(page)
+        orders = order_repository.get_orders(page, 10, fields, filters, keys)
+
+    orders_dict = order_service.orders_to_dicts(orders, fields)
+
+    if cursor is not None:
+        return {"items": orders_dict, "next_cursor": next_cursor}
     return orders_dict
 
 
+@order_bp.get("/export")
+def export_orders():
+    try:
+        lines = order_service.export_orders(request.args, current_app.config.get("EXPORT_CHUNK_SIZE", 1000))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+
+    return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+
 @order_bp.get("/<int:order_id>")
 def get_order(order_id):
-    order = (Order.query
-             .options(
-                joinedload(Order.customer),
-                joinedload(Order.employee),
-                joinedload(Order.shipper))
-             .get(order_id))
-    if order is None:
+    try:
+        return conditional_json(order_service.get_order(order_id, request.args.get("fields")))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    except ResourceNotFoundException:
         return f"order not found with id {order_id}", 404
 
-    order_dict = order.to_dict()
-    order_dict["customer"] = order.customer.to_dict() if order.customer else None
-    order_dict["employee"] = order.employee.to_dict() if order.employee else None
-    order_dict["shipper"] = order.shipper.to_dict() if order.shipper else None
-    order_dict["last_10_order_details"] = [order_detail.to_dict() for order_detail in order.order_details.limit(10).all()]
-
-    return order_dict
-
 
 @order_bp.post("/")
 def add_order():
-    data = request.json
-
-    required_fields = ['order_date', 'ship_via']
-    for field in required_fields:
-        if field not in data:
-            return {"error": f"Missing required field: {field}"}, 400
-
-    order_date = data.get('order_date') if datetime.fromisoformat(data.get('order_date')) else None
-    required_date = data.get('required_date') if datetime.fromisoformat(data.get('required_date')) else None
-    shipped_date = data.get('shipped_date') if datetime.fromisoformat(data.get('shipped_date')) else None
-
-    new_order = Order(
-        customer_id=data.get('customer_id'),
-        employee_id=data.get('employee_id'),
-        order_date=order_date,
-        required_date=required_date,
-        shipped_date=shipped_date,
-        ship_via=data['ship_via'],
-        freight=data.get('freight'),
-        ship_name=data.get('ship_name'),
-        ship_address=data.get('ship_address'),
-        ship_city=data.get('ship_city'),
-        ship_region=data.get('ship_region'),
-        ship_postal_code=data.get('ship_postal_code'),
-        ship_country=data.get('ship_country')
-    )
-
-    db.session.add(new_order)
-    db.session.commit()
-
-    return {"message": f"Added order #{new_order.order_id} successfully!"}
+    try:
+        new_order = order_service.add_order(request.json)
+    except ValidationException as e:
+        return {"error": e.msg}, 400
 
+    return {"message": f"Added order #{new_order['order_id']} successfully!", "order": new_order}
 
-@order_bp.patch("/<order_id>")
-def update_order(order_id):
-    data = request.json
-    existing_order = Order.query.get(order_id)
 
-    if not existing_order:
-        return f"order not found with id {order_id}", 404
+@order_bp.post("/bulk")
+def add_orders():
+    try:
+        payload = bulk_service.parse_payload(request.get_data(), request.mimetype)
+        upsert = request.args.get("upsert", "false").lower() == "true"
+        return order_service.add_orders(payload, upsert, current_app.config.get("BULK_CHUNK_SIZE"))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while adding orders in bulk")
+        return {"error": "something went wrong"}, 500
 
-    for key, value in data.items():
-        if hasattr(existing_order, key):
-            setattr(existing_order, key, value)
 
-    db.session.commit()
+@order_bp.patch("/<order_id>")
+def update_order(order_id):
+    try:
+        existing_order = order_service.update_order(request.json, order_id)
+    except ResourceNotFoundException:
+        return f"order not found with id {order_id}", 404
 
     return {"message": f"Updated order #{existing_order.order_id} successfully!"}
-
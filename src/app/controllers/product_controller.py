@@ -1,9 +1,13 @@
 import logging
-from sqlalchemy.orm import selectinload, joinedload
-from flask import Blueprint, request
+from flask import Blueprint, current_app, request
 
+from app.exceptions import InvalidCursorException, ResourceNotFoundException, ValidationException
+from app.filtering import parse_filters, parse_sort
+from app.http_cache import conditional_json
 from app.models import Product
-from app.db import db
+from app.projection import parse_fields
+from app.repositories import product_repository
+from app.services import bulk_service, product_service
 
 
 product_bp = Blueprint("products", __name__)
@@ -11,78 +15,81 @@ logger = logging.getLogger("northwind")
 
 @product_bp.get("/")
 def get_all_products():
-    page = int(request.args.get("page", 1))
-    if page <= 0:
-        return "invalid page", 400
-
-    print(f"page number is {page}",)
-    print(f"offset number is {(page - 1) * 10}")
-
-    products = (Product.query.limit(10).offset((page - 1)  * 10)
-                .options(selectinload(Product.category), selectinload(Product.supplier))
-                .all())
-    product_dicts = []
-    for product in products:
-        product_dict = product.to_dict()
-        product_dict["category"] = product.category.to_dict() if product.category else None
-        product_dict["supplier"] = product.supplier.to_dict() if product.supplier else None
-        product_dicts.append(product_dict)
-
+    cursor = request.args.get("cursor")
+    try:
+        fields = parse_fields(Product, request.args.get("fields"))
+        filters = parse_filters(Product, request.args)
+        keys = parse_sort(Product, request.args.get("sort"))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    if cursor is not None:
+        try:
+            products, next_cursor = product_repository.get_products_after(cursor, 10, fields, filters, keys)
+        except InvalidCursorException as e:
+            return {"error": e.msg}, 400
+    else:
+        page = request.args.get("page", "1")
+        if not page.isdigit() or int(page) <= 0:
+            return "invalid page", 400
+        page = int(page)
+        logger.debug("page number is %s, offset number is %s", page, (page - 1) * 10)
+
+        products = product_repository.get_products(page, 10, fields, filters, keys)
+
+    product_dicts = product_service.products_to_dicts(products, fields)
+
+    if cursor is not None:
+        return {"items": product_dicts, "next_cursor": next_cursor}
     return product_dicts
 
+@product_bp.get("/search")
+def search_products():
+    try:
+        return product_service.search_products(request.args.get("q"), request.args.get("limit", "10"))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while searching products")
+        return {"error": "something went wrong"}, 500
+
 @product_bp.get("/<int:product_id>")
 def get_product(product_id):
-    product = Product.query.options(joinedload(Product.category), joinedload(Product.supplier)).get(product_id)
-    # product = Product.query.get(product_id)
-    if product is None:
+    try:
+        return conditional_json(product_service.get_product(product_id, request.args.get("fields")))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    except ResourceNotFoundException:
         return f"product not found with id {product_id}", 404
 
-    product_dict = product.to_dict()
-    product_dict["category"] = product.category.to_dict() if product.category else None
-    product_dict["supplier"] = product.supplier.to_dict() if product.supplier else None
-
-    return product_dict
-
 
 @product_bp.post("/")
 def add_product():
-    data = request.json
-    required_fields = ['product_name', 'quantity_per_unit', 'discontinued']
-    for field in required_fields:
-        if field not in data:
-            return {"error": f"Missing required field: {field}"}, 400
-
-    new_product = Product(
-        product_name=data['product_name'],
-        supplier_id=data.get('supplier_id'),
-        category_id=data.get('category_id'),
-        quantity_per_unit=data['quantity_per_unit'],
-        unit_price=data.get('unit_price'),
-        units_in_stock=data.get('units_in_stock'),
-        units_on_order=data.get('units_on_order'),
-        reorder_level=data.get('reorder_level'),
-        discontinued= 1 if data['discontinued'] == True else 0
-    )
-
-    db.session.add(new_product)
-    db.session.commit()
+    try:
+        new_product = product_service.add_product(request.json)
+    except ValidationException as e:
+        return {"error": e.msg}, 400
 
     return {"message": f"Added {new_product.product_name} successfully!"}
 
 
+@product_bp.post("/bulk")
+def add_products():
+    try:
+        payload = bulk_service.parse_payload(request.get_data(), request.mimetype)
+        upsert = request.args.get("upsert", "false").lower() == "true"
+        return product_service.add_products(payload, upsert, current_app.config.get("BULK_CHUNK_SIZE"))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while adding products in bulk")
+        return {"error": "something went wrong"}, 500
+
+
 @product_bp.patch("/<product_id>")
 def update_product(product_id):
-    data = request.json
-    existing_product = Product.query.get(product_id)
-
-    if not existing_product:
+    try:
+        existing_product = product_service.update_product(request.json, product_id)
+    except ResourceNotFoundException:
         return f"Product not found with id {product_id}", 404
 
-    for key, value in data.items():
-        if hasattr(existing_product, key):
-            setattr(existing_product, key, value)
-
-    db.session.commit()
-
     return {"message": f"Updated product {existing_product.product_name} successfully!"}
-
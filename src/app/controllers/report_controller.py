@@ -0,0 +1,21 @@
+import logging
+
+from flask import Blueprint, request
+
+from app.exceptions import ValidationException
+from app.services import sales_rollup_service
+
+
+report_bp = Blueprint("reports", __name__)
+logger = logging.getLogger("northwind")
+
+
+@report_bp.get("/sales/<dimension>")
+def get_sales(dimension):
+    try:
+        return sales_rollup_service.get_sales(dimension, request.args.get("month_from"), request.args.get("month_to"))
+    except ValidationException as e:
+        return {"error": e.msg}, 400
+    except Exception:
+        logger.exception("Something went wrong while reporting sales per %s", dimension)
+        return {"error": "something went wrong"}, 500
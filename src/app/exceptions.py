@@ -26,3 +26,8 @@ class ResourceAlreadyExistsException(Exception):
         super().__init__(msg)
         self.msg = msg
 
+
+class InvalidCursorException(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.msg = msg
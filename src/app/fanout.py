@@ -0,0 +1,53 @@
+import contextvars
+import logging as root_logger
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from flask import Flask, current_app
+
+
+logger = root_logger.getLogger("northwind")
+
+_executors: Dict[Tuple[int, int], ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _executor(max_workers: int) -> ThreadPoolExecutor:
+    # executor threads do not survive a fork, every worker process gets its own executors, one per size
+    key = (os.getpid(), max_workers)
+    executor = _executors.get(key)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(key)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="northwind-fanout")
+                for stale_key in [stale_key for stale_key in _executors if stale_key[0] != os.getpid()]:
+                    del _executors[stale_key]
+                _executors[key] = executor
+    return executor
+
+
+def _run_in_app_context(app: Flask, task: Callable[[], Any]) -> Any:
+    # a new app context gets its own scoped session, and so its own pooled connection
+    with app.app_context():
+        return task()
+
+
+def fan_out(tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """Runs independent query tasks and returns their results by name. With FANOUT_MAX_WORKERS of 1, the
+    default, they run one after another in the calling context and its session. Above 1 they run
+    concurrently, each with its own session, connection and transaction, so they may read different
+    snapshots. Every request thread of the process shares the same FANOUT_MAX_WORKERS threads, which is
+    only worth it for slow queries on a database with spare connections. Tasks must not fan out themselves."""
+    max_workers = current_app.config["FANOUT_MAX_WORKERS"]
+    if max_workers <= 1 or len(tasks) <= 1:
+        return {name: task() for name, task in tasks.items()}
+
+    app = current_app._get_current_object()
+    executor = _executor(max_workers)
+    # each task runs in a copy of the caller's context, so its statements count towards the request
+    futures = {name: executor.submit(contextvars.copy_context().run, _run_in_app_context, app, task)
+               for name, task in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
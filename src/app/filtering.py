@@ -0,0 +1,87 @@
+import operator
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import inspect
+
+from app.exceptions import ValidationException
+from app.models import Customer, Order, Product
+from app.pagination import Keyset
+
+
+def _parse_bool(value: str) -> int:
+    if value.lower() not in ("true", "false"):
+        raise ValueError(value)
+    return 1 if value.lower() == "true" else 0
+
+
+# query parameters accepted as filters by the list endpoints: name -> (column, operator, value parser).
+# The selective ones are backed by the indexes declared in app/models.py.
+FILTERS: Dict[Any, Dict[str, Tuple[str, Callable, Callable[[str], Any]]]] = {
+    Order: {
+        "customer_id": ("customer_id", operator.eq, str),
+        "employee_id": ("employee_id", operator.eq, int),
+        "ship_country": ("ship_country", operator.eq, str),
+        "order_date_from": ("order_date", operator.ge, datetime.fromisoformat),
+        "order_date_to": ("order_date", operator.le, datetime.fromisoformat),
+    },
+    Product: {
+        "category_id": ("category_id", operator.eq, int),
+        "supplier_id": ("supplier_id", operator.eq, int),
+        "discontinued": ("discontinued", operator.eq, _parse_bool),
+        "unit_price_min": ("unit_price", operator.ge, float),
+        "unit_price_max": ("unit_price", operator.le, float),
+    },
+    Customer: {
+        "country": ("country", operator.eq, str),
+        "city": ("city", operator.eq, str),
+    },
+}
+
+# columns the list endpoints can be sorted by, each one is the leading column of an index ending with
+# (or, for integer primary keys, implicitly followed by) the primary key, so no sort step is needed
+SORTS = {
+    Order: ("order_id", "order_date"),
+    Product: ("product_id", "product_name", "unit_price"),
+    Customer: ("customer_id", "company_name"),
+}
+
+# query parameters of the list endpoints which are not filters
+LIST_ARGS = ("page", "cursor", "fields", "sort")
+
+
+def parse_filters(model, args: Optional[Mapping[str, str]]) -> List:
+    """Turns the filter query parameters of a list endpoint into SQL predicates, rejecting unknown
+    filters and values which do not parse."""
+    allowed = FILTERS[model]
+    filters = []
+    for name, value in (args or {}).items():
+        if name in LIST_ARGS:
+            continue
+        if name not in allowed:
+            raise ValidationException(f"Invalid filter {name}, allowed filters are {', '.join(allowed)}")
+        column_name, compare, parse = allowed[name]
+        try:
+            parsed = parse(value)
+        except ValueError:
+            raise ValidationException(f"Invalid value {value} for filter {name}")
+        filters.append(compare(getattr(model, column_name), parsed))
+    return filters
+
+
+def parse_sort(model, value: Optional[str]) -> Keyset:
+    """Reads a `sort` query parameter such as `order_date` or `-unit_price` (descending) into a keyset,
+    the primary key breaking ties. The default is the primary key in ascending order."""
+    primary_key = getattr(model, inspect(model).primary_key[0].key)
+    if value is None or len(value.strip()) == 0:
+        return [(primary_key, False)]
+
+    value = value.strip()
+    descending = value.startswith("-")
+    name = value.lstrip("-")
+    if name not in SORTS[model]:
+        raise ValidationException(f"Invalid sort {value}, allowed sorts are {', '.join(SORTS[model])}")
+    column = getattr(model, name)
+    if column is primary_key:
+        return [(primary_key, descending)]
+    return [(column, descending), (primary_key, descending)]
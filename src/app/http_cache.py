@@ -0,0 +1,30 @@
+import hashlib
+
+from flask import Response, current_app, jsonify, request
+
+
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+def _cache_control() -> str:
+    return current_app.config.get("CACHE_CONTROL", {}).get(request.blueprint, DEFAULT_CACHE_CONTROL)
+
+
+def conditional_json(data) -> Response:
+    """JSON response with a strong ETag of its body and the Cache-Control header configured for the
+    blueprint in CACHE_CONTROL (e.g. {"products": "public, max-age=60"}). A request whose
+    If-None-Match matches the ETag gets an empty 304 Not Modified instead."""
+    response = jsonify(data)
+    response.headers["Cache-Control"] = _cache_control()
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def conditional_bytes(data: bytes, mimetype: str, chunk_size: int = 64 * 1024) -> Response:
+    """Same as `conditional_json` for a binary body, which is streamed in `chunk_size` pieces."""
+    response = Response((data[start:start + chunk_size] for start in range(0, len(data), chunk_size)),
+                        mimetype=mimetype)
+    response.headers["Cache-Control"] = _cache_control()
+    response.headers["Content-Length"] = str(len(data))
+    response.set_etag(hashlib.sha1(data).hexdigest())
+    return response.make_conditional(request)
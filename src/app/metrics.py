@@ -0,0 +1,235 @@
+import bisect
+import threading
+import time
+import weakref
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import Flask, Response, current_app, g, request
+
+from app import cache, query_stats
+from app.db import db
+from app.pool_stats import pool_stats
+
+
+# seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Shard:
+    # written by a single thread only, so updates need no lock
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+    def add_to(self, counters: Dict[Tuple[str, Labels], float],
+               histograms: Dict[Tuple[str, Labels], List[float]]) -> None:
+        # dict.copy() does not interleave with the writes of the owning thread
+        for key, value in self.counters.copy().items():
+            counters[key] = counters.get(key, 0) + value
+        for key, values in self.histograms.copy().items():
+            total = histograms.setdefault(key, [0.0] * len(values))
+            for index, value in enumerate(list(values)):
+                total[index] += value
+
+
+class _ShardHolder:
+    # the thread-local value, dropped with its thread, which then retires the shard
+    def __init__(self, shard: _Shard):
+        self.shard = shard
+
+
+class Registry:
+    """Counters, gauges and histograms sharded per thread: a thread only ever updates its own shard,
+    without locking, and a scrape adds the shards up. The shard of a finished thread is folded into the
+    retired totals, so threads coming and going do not grow the registry. Gauges are counters which
+    also go down."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: Set[_Shard] = set()
+        self._retired = _Shard()
+        self._shards_lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+
+    def _shard(self) -> _Shard:
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = self._local.holder = _ShardHolder(_Shard())
+            with self._shards_lock:
+                self._shards.add(holder.shard)
+            weakref.finalize(holder, self._retire, holder.shard)
+        return holder.shard
+
+    def _retire(self, shard: _Shard) -> None:
+        with self._shards_lock:
+            self._shards.discard(shard)
+            shard.add_to(self._retired.counters, self._retired.histograms)
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Optional[Tuple[float, ...]] = None) -> None:
+        self._help[name] = (kind, help_text)
+        if buckets is not None:
+            self._buckets[name] = buckets
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        histograms = self._shard().histograms
+        buckets = self._buckets[name]
+        key = (name, labels)
+        # a count per bucket (not cumulative), then the sum and the count of the observations
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0.0] * (len(buckets) + 3)
+        values[bisect.bisect_left(buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def collect(self) -> Tuple[Dict[Tuple[str, Labels], float], Dict[Tuple[str, Labels], List[float]]]:
+        counters: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        with self._shards_lock:
+            self._retired.add_to(counters, histograms)
+            shards = list(self._shards)
+        for shard in shards:
+            shard.add_to(counters, histograms)
+        return counters, histograms
+
+    def render(self, gauges: Iterable[Tuple[str, Labels, float]] = ()) -> str:
+        """The metrics in the Prometheus text exposition format, with `gauges` read at scrape time. The
+        samples of a metric are ordered by labels, the buckets of a histogram by bound, then its sum and
+        count."""
+        counters, histograms = self.collect()
+        samples: Dict[str, List[Tuple[Labels, List[str]]]] = {}
+        for (name, labels), value in counters.items():
+            samples.setdefault(name, []).append((labels, [_sample(name, labels, value)]))
+        for name, labels, value in gauges:
+            samples.setdefault(name, []).append((labels, [_sample(name, labels, value)]))
+        for (name, labels), values in histograms.items():
+            lines = []
+            cumulative = 0.0
+            for bound, count in zip(self._buckets[name] + (float("inf"),), values):
+                cumulative += count
+                lines.append(_sample(f"{name}_bucket", labels + (("le", _format(bound)),), cumulative))
+            lines.append(_sample(f"{name}_sum", labels, values[-2]))
+            lines.append(_sample(f"{name}_count", labels, values[-1]))
+            samples.setdefault(name, []).append((labels, lines))
+
+        output = []
+        for name in sorted(samples):
+            if name in self._help:
+                kind, help_text = self._help[name]
+                output.append(f"# HELP {name} {help_text}")
+                output.append(f"# TYPE {name} {kind}")
+            for _, lines in sorted(samples[name], key=lambda sample: sample[0]):
+                output.extend(lines)
+        return "\n".join(output) + "\n"
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _sample(name: str, labels: Labels, value: float) -> str:
+    if not labels:
+        return f"{name} {_format(value)}"
+    label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels)
+    return f"{name}{{{label_text}}} {_format(value)}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _registry() -> Registry:
+    return current_app.extensions["northwind_metrics"]
+
+
+def _start_request() -> None:
+    g.metrics_started = time.perf_counter()
+    g.metrics_blueprint = request.blueprint or "none"
+    _registry().inc("northwind_http_requests_in_flight", (("blueprint", g.metrics_blueprint),))
+
+
+def _finish_request(response: Response) -> Response:
+    blueprint = g.get("metrics_blueprint")
+    if blueprint is None:
+        return response
+    registry = _registry()
+    elapsed = time.perf_counter() - g.metrics_started
+    # the URL rule, not the path, so there is a label set per endpoint rather than per id
+    route = request.url_rule.rule if request.url_rule is not None else "none"
+    labels = (("blueprint", blueprint), ("route", route), ("method", request.method))
+    registry.inc("northwind_http_requests_total", labels + (("status", str(response.status_code)),))
+    registry.observe("northwind_http_request_duration_seconds", labels, elapsed)
+    stats = query_stats.current()
+    if stats is not None:
+        registry.inc("northwind_db_queries_total", labels[:2], stats.count)
+        registry.observe("northwind_db_time_seconds", labels[:2], stats.total_time)
+    return response
+
+
+def _end_request(exc: Optional[BaseException]) -> None:
+    blueprint = g.pop("metrics_blueprint", None)
+    if blueprint is not None:
+        _registry().inc("northwind_http_requests_in_flight", (("blueprint", blueprint),), -1)
+
+
+def _scrape_gauges() -> List[Tuple[str, Labels, float]]:
+    gauges = []
+    for name, cache_stats in cache.stats().items():
+        labels = (("cache", name),)
+        for counter in ("hits", "misses", "evictions"):
+            if counter in cache_stats:
+                gauges.append((f"northwind_cache_{counter}_total", labels, cache_stats[counter]))
+        lookups = cache_stats.get("hits", 0) + cache_stats.get("misses", 0)
+        if lookups:
+            gauges.append(("northwind_cache_hit_ratio", labels, round(cache_stats["hits"] / lookups, 6)))
+    pool = pool_stats(db.engine)
+    for name in ("size", "checked_out", "overflow"):
+        if name in pool:
+            gauges.append((f"northwind_db_pool_{name}", (), pool[name]))
+    if "checkouts" in pool:
+        gauges.append(("northwind_db_pool_checkouts_total", (), pool["checkouts"]))
+        gauges.append(("northwind_db_pool_wait_seconds_total", (), pool["total_wait_ms"] / 1000))
+    return gauges
+
+
+def render() -> str:
+    return _registry().render(_scrape_gauges())
+
+
+def init_app(app: Flask) -> None:
+    """Request, DB and cache metrics of the process, served at /metrics. Must follow query_stats.init_app
+    for the DB figures."""
+    registry = Registry()
+    registry.describe("northwind_http_requests_total", "counter", "Requests served, by blueprint, route, method and status.")
+    registry.describe("northwind_http_requests_in_flight", "gauge", "Requests being served.")
+    registry.describe("northwind_http_request_duration_seconds", "histogram", "Time spent serving requests.",
+                      LATENCY_BUCKETS)
+    registry.describe("northwind_db_queries_total", "counter", "SQL statements issued by requests.")
+    registry.describe("northwind_db_time_seconds", "histogram", "Time spent in SQL statements per request.",
+                      DB_TIME_BUCKETS)
+    registry.describe("northwind_cache_hits_total", "counter", "Cache lookups served from the cache.")
+    registry.describe("northwind_cache_misses_total", "counter", "Cache lookups which missed.")
+    registry.describe("northwind_cache_evictions_total", "counter", "Cache entries evicted to make room.")
+    registry.describe("northwind_cache_hit_ratio", "gauge", "Share of the cache lookups which hit.")
+    registry.describe("northwind_db_pool_size", "gauge", "Connections kept open by the pool.")
+    registry.describe("northwind_db_pool_checked_out", "gauge", "Connections in use.")
+    registry.describe("northwind_db_pool_overflow", "gauge", "Connections opened beyond the pool size.")
+    registry.describe("northwind_db_pool_checkouts_total", "counter", "Connections checked out of the pool.")
+    registry.describe("northwind_db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection.")
+    app.extensions["northwind_metrics"] = registry
+
+    if app.config["METRICS_ENABLED"]:
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+        app.teardown_request(_end_request)
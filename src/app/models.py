@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import String, ForeignKey, Text
+from sqlalchemy import String, ForeignKey, Index, Text
 from sqlalchemy.orm import Mapped, DynamicMapped, relationship, mapped_column
 
 from app.db import db
@@ -9,6 +9,11 @@ from app.db import db
 
 class Customer(db.Model):
     __tablename__ = "customers"
+    __table_args__ = (
+        Index("ix_customers_company_name_customer_id", "company_name", "customer_id"),
+        Index("ix_customers_country", "country"),
+        Index("ix_customers_city", "city"),
+    )
 
     customer_id: Mapped[str] = mapped_column(String(255), primary_key=True)
     company_name: Mapped[str] = mapped_column(String(40))
@@ -80,8 +85,8 @@ class Employee(db.Model):
     country: Mapped[Optional[str]] = mapped_column(String(15))
     home_phone: Mapped[Optional[str]] = mapped_column(String(24))
     extension: Mapped[Optional[str]] = mapped_column(String(4))
-    photo: Mapped[Optional[bytes]]
-    notes: Mapped[Optional[str]] = mapped_column(Text)
+    photo: Mapped[Optional[bytes]] = mapped_column(deferred=True)
+    notes: Mapped[Optional[str]] = mapped_column(Text, deferred=True)
     reports_to: Mapped[Optional[int]] = mapped_column(ForeignKey("employees.employee_id"))
     photo_path: Mapped[Optional[str]] = mapped_column(String(255))
 
@@ -111,6 +116,15 @@ class Employee(db.Model):
             "photo_path": self.photo_path
         }
 
+    def to_summary_dict(self):
+        return {
+            "employee_id": self.employee_id,
+            "last_name": self.last_name,
+            "first_name": self.first_name,
+            "title": self.title,
+            "photo_url": f"/v1/employees/{self.employee_id}/photo"
+        }
+
 
 class Region(db.Model):
     __tablename__ = "region"
@@ -184,6 +198,12 @@ class Supplier(db.Model):
 
 class Product(db.Model):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_category_id", "category_id"),
+        Index("ix_products_supplier_id", "supplier_id"),
+        Index("ix_products_product_name", "product_name"),
+        Index("ix_products_unit_price", "unit_price"),
+    )
 
     product_id: Mapped[int] = mapped_column(primary_key=True)
     product_name: Mapped[str] = mapped_column(String(40))
@@ -233,6 +253,12 @@ class Shipper(db.Model):
 
 class Order(db.Model):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_customer_id_order_date", "customer_id", "order_date"),
+        Index("ix_orders_order_date", "order_date"),
+        Index("ix_orders_ship_country", "ship_country"),
+        Index("ix_orders_employee_id", "employee_id"),
+    )
 
     order_id: Mapped[int] = mapped_column(primary_key=True)
     customer_id: Mapped[Optional[str]] = mapped_column(String(255), ForeignKey("customers.customer_id"))
@@ -275,6 +301,9 @@ class Order(db.Model):
 
 class OrderDetails(db.Model):
     __tablename__ = "order_details"
+    __table_args__ = (
+        Index("ix_order_details_product_id", "product_id"),
+    )
 
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.order_id"), primary_key=True)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.product_id"), primary_key=True)
@@ -294,3 +323,17 @@ class OrderDetails(db.Model):
             "discount": self.discount
         }
 
+
+class SalesRollup(db.Model):
+    """Order lines aggregated per month, product, employee and ship country, maintained by
+    sales_rollup_service as orders are written. Orders without a date, employee or ship country
+    are counted under "", 0 and "" respectively."""
+    __tablename__ = "sales_rollups"
+
+    month: Mapped[str] = mapped_column(String(7), primary_key=True)
+    product_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    employee_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    ship_country: Mapped[str] = mapped_column(String(15), primary_key=True)
+    order_lines: Mapped[int]
+    quantity: Mapped[int]
+    revenue: Mapped[float]
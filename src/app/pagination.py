@@ -0,0 +1,89 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, and_, or_, false
+
+from app.db import db
+from app.exceptions import InvalidCursorException
+
+
+# A keyset is an ordered list of (column, descending) pairs. The last column must be unique
+# (normally the primary key) so that every row has a distinct position in the ordering.
+Keyset = Sequence[Tuple[Any, bool]]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    encoded = [{"dt": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(encoded, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_value(value: Any) -> Any:
+    # only the values encode_cursor writes, anything else would end up in the WHERE clause
+    if isinstance(value, dict):
+        if list(value) != ["dt"] or not isinstance(value["dt"], str):
+            raise ValueError("unexpected cursor value")
+        return datetime.fromisoformat(value["dt"])
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+        raise ValueError("unexpected cursor value")
+    return value
+
+
+def decode_cursor(cursor: str, expected_length: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != expected_length:
+            raise ValueError("unexpected cursor shape")
+        return [_decode_value(value) for value in values]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursorException(f"Invalid cursor {cursor}")
+
+
+def _equals(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def _after(column, value, descending: bool):
+    # NULLs sort first in ascending order and last in descending order (MySQL semantics)
+    if descending:
+        return false() if value is None else or_(column < value, column.is_(None))
+    return column.isnot(None) if value is None else column > value
+
+
+def keyset_predicate(keys: Keyset, values: Sequence[Any]):
+    clauses = []
+    for index, (column, descending) in enumerate(keys):
+        preceding = [_equals(keys[i][0], values[i]) for i in range(index)]
+        clauses.append(and_(*preceding, _after(column, values[index], descending)))
+    return or_(*clauses)
+
+
+def keyset_order_by(keys: Keyset) -> List[Any]:
+    return [column.desc() if descending else column.asc() for column, descending in keys]
+
+
+def _key_value(item, column):
+    if isinstance(item, Mapping):
+        return item[column.key]
+    return getattr(item, column.key)
+
+
+def paginate_keyset(query, keys: Keyset, cursor: Optional[str], page_size: int) -> Tuple[List[Any], Optional[str]]:
+    """Returns one page of `query` ordered by `keys` starting right after `cursor`, and the cursor
+    of the following page (None when this is the last one). An empty cursor starts from the beginning.
+    `query` is either an ORM query or a Core select, whose rows are returned as they are."""
+    if cursor:
+        query = query.filter(keyset_predicate(keys, decode_cursor(cursor, len(keys))))
+
+    query = query.order_by(*keyset_order_by(keys)).limit(page_size + 1)
+    items = db.session.execute(query).all() if isinstance(query, Select) else query.all()
+    if len(items) <= page_size:
+        return items, None
+
+    items = items[:page_size]
+    next_cursor = encode_cursor([_key_value(items[-1], column) for column, _ in keys])
+    return items, next_cursor
@@ -0,0 +1,143 @@
+import cProfile
+import functools
+import hmac
+import logging as root_logger
+import marshal
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from flask import Flask, Response, current_app, g, request
+
+
+logger = root_logger.getLogger("northwind")
+
+# a single profiler can be active at a time, requests arriving meanwhile are not profiled
+_profiler_lock = threading.Lock()
+
+
+def _requested() -> Optional[str]:
+    """`download` or `save` when the request asks to be profiled with the profiling header carrying
+    PROFILE_TOKEN, `save` when it is sampled, otherwise None."""
+    header = request.headers.get(current_app.config["PROFILE_HEADER"])
+    if header is not None:
+        mode, _, token = header.partition(";")
+        expected = current_app.config["PROFILE_TOKEN"]
+        if not expected or not hmac.compare_digest(token.strip(), expected):
+            logger.warning("Ignoring profiling request with an invalid token for %s", request.path)
+            return None
+        return "download" if mode.strip() == "download" else "save"
+    if random.random() < current_app.config["PROFILE_SAMPLE_RATE"]:
+        return "save"
+    return None
+
+
+def _start_profile() -> None:
+    mode = _requested()
+    if mode is None or not _profiler_lock.acquire(blocking=False):
+        return
+    g.profile_mode = mode
+    g.profile_started = time.perf_counter()
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+
+def _stop_profile() -> Optional[cProfile.Profile]:
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return None
+    profiler.disable()
+    _profiler_lock.release()
+    return profiler
+
+
+def _file_name(method: str, path: str, elapsed_ms: float) -> str:
+    path = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    return f"{started}-{method}-{path}-{elapsed_ms:.0f}ms.prof"
+
+
+def _dump(profiler: cProfile.Profile) -> bytes:
+    profiler.create_stats()
+    # the format written by cProfile and read by pstats, snakeviz and the like
+    return marshal.dumps(profiler.stats)
+
+
+def _save(profiler: cProfile.Profile, started: float, method: str, path: str, directory: str,
+          max_files: int) -> str:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    file_name = _file_name(method, path, elapsed_ms)
+    data = _dump(profiler)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, file_name), "wb") as profile_file:
+        profile_file.write(data)
+    # the names start with the time they were taken at, so the oldest sort first
+    profiles = sorted(name for name in os.listdir(directory) if name.endswith(".prof"))
+    for name in profiles[:max(len(profiles) - max_files, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+    logger.info("Saved profile of %s %s taking %.1f ms to %s", method, path, elapsed_ms, file_name,
+                extra={"profile": file_name})
+    return file_name
+
+
+def _finish_streamed_profile(profiler: cProfile.Profile, *args) -> None:
+    profiler.disable()
+    _profiler_lock.release()
+    _save(profiler, *args)
+
+
+def _finish_profile(response: Response) -> Response:
+    profiler = g.get("profiler")
+    if profiler is None:
+        return response
+
+    if g.profile_mode == "download":
+        # a streamed body is produced here, so that it is part of the profile
+        status = response.status_code
+        response.get_data()
+        response.close()
+        _stop_profile()
+        elapsed_ms = (time.perf_counter() - g.profile_started) * 1000
+        logger.info("Returning profile of %s %s taking %.1f ms", request.method, request.path, elapsed_ms)
+        return Response(_dump(profiler), mimetype="application/octet-stream", headers={
+            "Content-Disposition": f"attachment; filename={_file_name(request.method, request.path, elapsed_ms)}",
+            "X-Profile-Status": str(status),
+        })
+
+    directory, max_files = current_app.config["PROFILE_DIR"], current_app.config["PROFILE_MAX_FILES"]
+    if response.is_streamed:
+        # the body is produced after this hook, the profile goes on until the server closes the response
+        g.pop("profiler")
+        response.call_on_close(functools.partial(_finish_streamed_profile, profiler, g.profile_started,
+                                                 request.method, request.path, directory, max_files))
+        return response
+
+    _stop_profile()
+    file_name = _save(profiler, g.profile_started, request.method, request.path, directory, max_files)
+    response.headers["X-Profile"] = file_name
+    return response
+
+
+def _end_request(exc: Optional[BaseException]) -> None:
+    # when the response was never finalized
+    _stop_profile()
+
+
+def init_app(app: Flask) -> None:
+    """Profiles requests carrying the PROFILE_HEADER header with PROFILE_TOKEN, or a PROFILE_SAMPLE_RATE
+    share of all of them, with cProfile. Profiles are saved in PROFILE_DIR, keeping the PROFILE_MAX_FILES
+    latest, or returned instead of the response when the header is `download`. The profile of a streamed
+    response covers its body and ends when the response is closed. Must come before the other request
+    hooks so their time is part of the profile. Nothing is registered unless PROFILE_ENABLED is set."""
+    if not app.config["PROFILE_ENABLED"]:
+        return
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_end_request)
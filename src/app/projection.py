@@ -0,0 +1,78 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import load_only
+
+from app.exceptions import ValidationException
+from app.models import Order, Product
+from app.serializers import serializer_for
+
+
+# nested objects that can be requested by name, with the column they are looked up by
+RELATION_FIELDS = {
+    Order: {"customer": "customer_id", "employee": "employee_id", "shipper": "ship_via",
+            "last_10_order_details": "order_id"},
+    Product: {"category": "category_id", "supplier": "supplier_id"},
+}
+
+def _column_names(model) -> List[str]:
+    return [column.key for column in inspect(model).column_attrs]
+
+
+def parse_fields(model, value: Optional[str]) -> Optional[List[str]]:
+    """Parses a comma separated `fields` query parameter, None means every field."""
+    if value is None or len(value.strip()) == 0:
+        return None
+
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    allowed = _column_names(model) + list(RELATION_FIELDS.get(model, {}))
+    invalid = [field for field in fields if field not in allowed]
+    if invalid:
+        raise ValidationException(f"Invalid fields {', '.join(invalid)}, allowed fields are {', '.join(allowed)}")
+    return fields
+
+
+def wants(fields: Optional[List[str]], name: str) -> bool:
+    return fields is None or name in fields
+
+
+def select_columns(model, fields: Optional[List[str]], extra: Iterable[str] = ()) -> List:
+    """The requested columns, the primary key, the columns the requested nested objects are looked up
+    by and any `extra` column the caller needs, or every column when `fields` is None."""
+    if fields is None:
+        return [getattr(model, name) for name in _column_names(model)]
+    relations = RELATION_FIELDS.get(model, {})
+    names = set(extra)
+    names.update(column.key for column in inspect(model).primary_key)
+    for field in fields:
+        names.add(relations.get(field, field))
+    return [getattr(model, name) for name in _column_names(model) if name in names]
+
+
+def load_only_columns(model, fields: List[str], extra: Iterable[str] = ()):
+    """Loader option restricting the SELECT to the columns of `select_columns`."""
+    return load_only(*select_columns(model, fields, extra))
+
+
+def project(obj, fields: Optional[List[str]]) -> Dict:
+    """Serializes only the requested columns of `obj`, without touching (and so loading) the others."""
+    return project_all(type(obj), [obj], fields)[0]
+
+
+def project_all(model, items: List, fields: Optional[List[str]]) -> List[Dict]:
+    """Serializes instances of `model`, or the rows of a Core select of its columns, with `project`."""
+    if not items:
+        return []
+    if fields is not None:
+        relations = RELATION_FIELDS.get(model, {})
+        fields = tuple(field for field in fields if field not in relations)
+    serializer = serializer_for(model, fields, rows=isinstance(items[0], Row))
+    return [serializer(item) for item in items]
+
+
+def project_dict(data: Dict, fields: Optional[List[str]]) -> Dict:
+    """A copy of the requested fields of `data`, e.g. of a cached dict callers must not change."""
+    if fields is None:
+        return dict(data)
+    return {field: data[field] for field in fields if field in data}
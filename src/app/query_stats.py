@@ -0,0 +1,159 @@
+import functools
+import heapq
+import logging as root_logger
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, current_app, request
+from sqlalchemy import event
+
+from app.db import db
+
+
+logger = root_logger.getLogger("northwind")
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("northwind_query_stats", default=None)
+
+
+class QueryStats:
+    """SQL statements issued while serving one request: how many, their total time and the slowest ones.
+    Statements run by fanned out tasks are recorded from their threads too."""
+
+    def __init__(self, keep_slowest: int = 3):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_time = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest: List[Tuple[float, int, str]] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_time += duration
+            # the count breaks ties, statements are never compared
+            entry = (duration, self.count, statement)
+            if len(self._slowest) < self.keep_slowest:
+                heapq.heappush(self._slowest, entry)
+            elif duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def db_time_ms(self) -> float:
+        return round(self.total_time * 1000, 3)
+
+    @property
+    def slowest(self) -> List[Dict]:
+        with self._lock:
+            entries = sorted(self._slowest, reverse=True)
+        return [{"duration_ms": round(duration * 1000, 3), "statement": statement}
+                for duration, _, statement in entries]
+
+
+def current() -> Optional[QueryStats]:
+    """The statistics of the request being served, None outside of a request."""
+    return _current.get()
+
+
+class QueryStatsFilter(root_logger.Filter):
+    """Adds the query count and DB time so far to the records logged while serving a request, so the
+    JSON log lines carry them as fields."""
+
+    def filter(self, record: root_logger.LogRecord) -> bool:
+        stats = _current.get()
+        if stats is not None:
+            record.query_count = stats.count
+            record.db_time_ms = stats.db_time_ms
+        return True
+
+
+def listen(engine, slow_threshold: float) -> None:
+    """Records the statements of `engine` (the sync_engine of an async one) in the stats of the current
+    request, and logs the ones taking `slow_threshold` seconds or more."""
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # kept on the execution context, which goes away with the statement even when it fails
+        context.northwind_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context.northwind_started
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, duration)
+        if duration >= slow_threshold:
+            logger.warning("Slow query took %.1f ms: %s", duration * 1000, statement,
+                           extra={"duration_ms": round(duration * 1000, 3), "statement": statement})
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def begin() -> QueryStats:
+    """Starts recording the statements of the request being served, in the current context."""
+    stats = QueryStats(current_app.config["QUERY_STATS_SLOWEST"])
+    _current.set(stats)
+    return stats
+
+
+def finish(stats: QueryStats, method: str, path: str) -> List[str]:
+    """Logs the statements of a request, returns the values of its Server-Timing header."""
+    elapsed_ms = (time.perf_counter() - stats.started) * 1000
+    logger.info("%s %s issued %s queries in %.1f ms", method, path, stats.count, stats.total_time * 1000,
+                extra={"query_count": stats.count, "db_time_ms": stats.db_time_ms,
+                       "request_time_ms": round(elapsed_ms, 3), "slowest_queries": stats.slowest})
+    return [f'db;desc="{stats.count} queries";dur={stats.db_time_ms:.3f}', f"app;dur={elapsed_ms:.3f}"]
+
+
+def _start_request() -> None:
+    begin()
+
+
+def _recording(chunks: Iterable, stats: QueryStats) -> Iterator:
+    # the body is produced after the request hooks have run, its statements are recorded chunk by chunk
+    iterator = iter(chunks)
+    try:
+        while True:
+            token = _current.set(stats)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def _finish_request(response: Response) -> Response:
+    stats = _current.get()
+    if stats is None:
+        return response
+    if response.is_streamed:
+        # the body and its queries come after the headers, the totals are only logged once it is sent
+        response.response = _recording(response.response, stats)
+        response.call_on_close(functools.partial(finish, stats, request.method, request.path))
+        return response
+    for server_timing in finish(stats, request.method, request.path):
+        response.headers.add("Server-Timing", server_timing)
+    return response
+
+
+def _end_request(exc: Optional[BaseException]) -> None:
+    _current.set(None)
+
+
+def init_app(app: Flask) -> None:
+    """Records the statements of every request, reported in a Server-Timing header (except for streamed
+    responses) and a log line, and logs the ones slower than SLOW_QUERY_THRESHOLD_MS wherever they run.
+    Must follow db.init_app."""
+    if not app.config["QUERY_STATS_ENABLED"]:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            listen(engine, app.config["SLOW_QUERY_THRESHOLD_MS"] / 1000)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
@@ -0,0 +1,94 @@
+import logging as root_logger
+import threading
+import time
+from typing import Dict, List, Optional
+
+from flask import Flask, current_app
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
+from app.models import Category, Shipper, Supplier
+
+
+logger = root_logger.getLogger("northwind")
+
+DEFAULT_TTL = 300.0
+
+
+class ReferenceData:
+    """In-memory copy of the small, rarely changing lookup tables (categories, suppliers and shippers),
+    serialized once and reloaded from the database every `ttl` seconds. With `autoload` off, reads never
+    query the database and serve what `load` or `load_async` last loaded."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, autoload: bool = True):
+        self.ttl = ttl
+        self.autoload = autoload
+        self._categories: Dict[int, Dict] = {}
+        self._suppliers: Dict[int, Dict] = {}
+        self._shippers: Dict[int, Dict] = {}
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def expired(self) -> bool:
+        return self._expires_at <= time.monotonic()
+
+    def load(self) -> None:
+        self._store(Category.query.options(defer(Category.picture)).all(), Supplier.query.all(),
+                    Shipper.query.all())
+
+    async def load_async(self, session: AsyncSession) -> None:
+        categories = await session.scalars(select(Category).options(defer(Category.picture)))
+        suppliers = await session.scalars(select(Supplier))
+        shippers = await session.scalars(select(Shipper))
+        self._store(categories.all(), suppliers.all(), shippers.all())
+
+    def _store(self, categories: List[Category], suppliers: List[Supplier], shippers: List[Shipper]) -> None:
+        categories = {category.category_id: category.to_dict() for category in categories}
+        suppliers = {supplier.supplier_id: supplier.to_dict() for supplier in suppliers}
+        shippers = {shipper.shipper_id: shipper.to_dict() for shipper in shippers}
+        self._categories, self._suppliers, self._shippers = categories, suppliers, shippers
+        self._expires_at = time.monotonic() + self.ttl
+        logger.debug("Loaded %s categories, %s suppliers and %s shippers",
+                     len(categories), len(suppliers), len(shippers))
+
+    def _ensure_loaded(self) -> None:
+        if not self.autoload or self._expires_at > time.monotonic():
+            return
+        with self._lock:
+            if self._expires_at <= time.monotonic():
+                self.load()
+
+    def category(self, category_id: Optional[int]) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self._categories.get(category_id)
+
+    def supplier(self, supplier_id: Optional[int]) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self._suppliers.get(supplier_id)
+
+    def shipper(self, shipper_id: Optional[int]) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self._shippers.get(shipper_id)
+
+
+def init_app(app: Flask, autoload: bool = True) -> None:
+    app.extensions["northwind_reference_data"] = ReferenceData(app.config.get("REFERENCE_DATA_TTL", DEFAULT_TTL),
+                                                               autoload)
+
+
+def preload(app: Flask) -> None:
+    """Loads the reference data up front, so that the first request of a worker does not pay for it.
+    A failure is only logged, the data is then loaded by the first request needing it."""
+    try:
+        with app.app_context():
+            get_reference_data().load()
+    except Exception:
+        logger.exception("Could not preload the reference data")
+
+
+def get_reference_data() -> ReferenceData:
+    if "northwind_reference_data" not in current_app.extensions:
+        init_app(current_app)
+    return current_app.extensions["northwind_reference_data"]
@@ -0,0 +1,62 @@
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models import Customer, Order, OrderDetails, Product
+from app.repositories.order_repository import group_by_order, order_details_statement
+
+
+async def get_customers(session: AsyncSession, page: int, page_size: int) -> List[Customer]:
+    result = await session.scalars(select(Customer).limit(page_size).offset((page - 1) * page_size))
+    return result.all()
+
+
+async def get_customer(session: AsyncSession, customer_id: str) -> Optional[Customer]:
+    return await session.get(Customer, customer_id)
+
+
+async def get_products(session: AsyncSession, page: int, page_size: int) -> List[Product]:
+    result = await session.scalars(select(Product).limit(page_size).offset((page - 1) * page_size))
+    return result.all()
+
+
+async def get_product(session: AsyncSession, product_id: int) -> Optional[Product]:
+    return await session.get(Product, product_id)
+
+
+async def _with_order_details(session: AsyncSession,
+                              orders: List[Order]) -> Tuple[List[Order], Dict[int, List[OrderDetails]]]:
+    # relationships cannot be lazy loaded on an async session, everything is loaded up front
+    if not orders:
+        return orders, {}
+    result = await session.scalars(order_details_statement([order.order_id for order in orders]))
+    return orders, group_by_order(result.all())
+
+
+def _orders_statement():
+    return select(Order).options(selectinload(Order.customer), selectinload(Order.employee))
+
+
+async def get_orders(session: AsyncSession, page: int,
+                     page_size: int) -> Tuple[List[Order], Dict[int, List[OrderDetails]]]:
+    result = await session.scalars(_orders_statement().limit(page_size).offset((page - 1) * page_size))
+    return await _with_order_details(session, result.all())
+
+
+async def get_order(session: AsyncSession, order_id: int) -> Tuple[List[Order], Dict[int, List[OrderDetails]]]:
+    result = await session.scalars(_orders_statement().where(Order.order_id == order_id))
+    return await _with_order_details(session, result.all())
+
+
+async def get_customer_orders(session: AsyncSession, customer_id: str, page: int,
+                              page_size: int) -> Optional[Tuple[List[Order], Dict[int, List[OrderDetails]]]]:
+    if await session.get(Customer, customer_id) is None:
+        return None
+    result = await session.scalars(
+        _orders_statement()
+        .where(Order.customer_id == customer_id)
+        .limit(page_size)
+        .offset((page - 1) * page_size))
+    return await _with_order_details(session, result.all())
@@ -1,11 +1,45 @@
-from typing import List
+from typing import Iterable, List, Optional, Sequence, Tuple
 
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+
+from app.db import db
 from app.models import Customer
+from app.pagination import Keyset, keyset_order_by, paginate_keyset
+from app.projection import load_only_columns, select_columns
+
+
+DEFAULT_KEYS = [(Customer.customer_id, False)]
+
+
+# listings are read only, they select plain rows instead of building ORM instances
+def _customers_statement(fields: Optional[List[str]], filters: Sequence = (), keys: Keyset = ()):
+    # the sort columns are selected too, the cursor of the next page is read from them
+    columns = select_columns(Customer, fields, extra=[column.key for column, _ in keys])
+    return select(*columns).where(*filters)
+
+
+def get_customers(page: int, page_size: int, fields: Optional[List[str]] = None, filters: Sequence = (),
+                  keys: Keyset = DEFAULT_KEYS) -> List[Row]:
+    statement = (_customers_statement(fields, filters, keys)
+                 .order_by(*keyset_order_by(keys))
+                 .limit(page_size)
+                 .offset((page - 1) * page_size))
+    return db.session.execute(statement).all()
+
+
+def get_customers_after(cursor: Optional[str], page_size: int, fields: Optional[List[str]] = None,
+                        filters: Sequence = (), keys: Keyset = DEFAULT_KEYS) -> Tuple[List[Row], Optional[str]]:
+    return paginate_keyset(_customers_statement(fields, filters, keys), keys, cursor, page_size)
 
 
-def get_customers(page: int, page_size: int) -> List[Customer]:
-    return Customer.query.limit(page_size).offset((page - 1) * page_size).all()
+def get_customers_by_ids(customer_ids: Iterable[str]) -> List[Row]:
+    return db.session.execute(
+        _customers_statement(None).where(Customer.customer_id.in_(set(customer_ids)))
+    ).all()
 
 
-def get_customer(customer_id: str) -> Customer:
-    return Customer.query.get(customer_id)
+def get_customer(customer_id: str, fields: Optional[List[str]] = None) -> Customer:
+    if fields is None:
+        return Customer.query.get(customer_id)
+    return Customer.query.options(load_only_columns(Customer, fields)).get(customer_id)
@@ -0,0 +1,20 @@
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+
+from app.db import db
+from app.models import Employee
+
+
+def get_employee_photo(employee_id: int) -> Optional[Tuple[int, Optional[bytes]]]:
+    return db.session.execute(
+        select(Employee.employee_id, Employee.photo).where(Employee.employee_id == employee_id)
+    ).first()
+
+
+def get_employee_summaries(employee_ids: Iterable[int]) -> List[Employee]:
+    return (Employee.query
+            .options(load_only(Employee.employee_id, Employee.last_name, Employee.first_name, Employee.title))
+            .filter(Employee.employee_id.in_(set(employee_ids)))
+            .all())
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, func, distinct
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import aliased
+
+from app.db import db
+from app.models import Order, OrderDetails, Product
+from app.pagination import Keyset, keyset_order_by, paginate_keyset
+from app.projection import select_columns
+
+
+def order_details_statement(order_ids: Sequence[int], limit: int = 10, rows: bool = False):
+    """Selects up to `limit` order details of every given order with a single windowed query,
+    as OrderDetails instances or, with `rows`, as plain rows of their columns."""
+    row_number = (func.row_number()
+                  .over(partition_by=OrderDetails.order_id, order_by=OrderDetails.product_id)
+                  .label("row_number"))
+    ranked = (select(OrderDetails, row_number)
+              .where(OrderDetails.order_id.in_(order_ids))
+              .subquery())
+    ranked_details = aliased(OrderDetails, ranked)
+    if rows:
+        columns = [getattr(ranked_details, column.key) for column in select_columns(OrderDetails, None)]
+    else:
+        columns = [ranked_details]
+    return (select(*columns)
+            .where(ranked.c.row_number <= limit)
+            .order_by(ranked.c.order_id, ranked.c.product_id))
+
+
+def group_by_order(order_details: Iterable) -> Dict[int, List]:
+    details_by_order = defaultdict(list)
+    for order_detail in order_details:
+        details_by_order[order_detail.order_id].append(order_detail)
+    return details_by_order
+
+
+def get_order_details_for_orders(order_ids: Sequence[int], limit: int = 10) -> Dict[int, List[Row]]:
+    if not order_ids:
+        return {}
+    return group_by_order(db.session.execute(order_details_statement(order_ids, limit, rows=True)).all())
+
+
+DEFAULT_KEYS = [(Order.order_id, False)]
+
+
+# listings are read only, they select plain rows instead of building ORM instances
+def _orders_statement(fields: Optional[List[str]], extra: Iterable[str] = ()):
+    return select(*select_columns(Order, fields, extra))
+
+
+def _filtered_orders_statement(fields: Optional[List[str]], filters: Sequence, keys: Keyset):
+    # the sort columns are selected too, the cursor of the next page is read from them
+    return _orders_statement(fields, extra=[column.key for column, _ in keys]).where(*filters)
+
+
+def get_orders(page: int, page_size: int, fields: Optional[List[str]] = None, filters: Sequence = (),
+               keys: Keyset = DEFAULT_KEYS) -> List[Row]:
+    statement = (_filtered_orders_statement(fields, filters, keys)
+                 .order_by(*keyset_order_by(keys))
+                 .limit(page_size)
+                 .offset((page - 1) * page_size))
+    return db.session.execute(statement).all()
+
+
+def get_orders_after(cursor: Optional[str], page_size: int, fields: Optional[List[str]] = None,
+                     filters: Sequence = (), keys: Keyset = DEFAULT_KEYS) -> Tuple[List[Row], Optional[str]]:
+    return paginate_keyset(_filtered_orders_statement(fields, filters, keys), keys, cursor, page_size)
+
+
+def get_customer_orders(customer_id: str, page: int, page_size: int,
+                        fields: Optional[List[str]] = None) -> List[Row]:
+    statement = (_orders_statement(fields)
+                 .where(Order.customer_id == customer_id)
+                 .limit(page_size)
+                 .offset((page - 1) * page_size))
+    return db.session.execute(statement).all()
+
+
+def get_customer_orders_after(customer_id: str, cursor: Optional[str], page_size: int,
+                              fields: Optional[List[str]] = None) -> Tuple[List[Row], Optional[str]]:
+    statement = _orders_statement(fields, extra=("order_date",)).where(Order.customer_id == customer_id)
+    return paginate_keyset(statement, [(Order.order_date, False), (Order.order_id, False)], cursor, page_size)
+
+
+def get_order_customer_ids(order_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+    order_ids = set(order_ids)
+    if not order_ids:
+        return {}
+    return dict(db.session.execute(
+        select(Order.order_id, Order.customer_id).where(Order.order_id.in_(order_ids))
+    ).tuples().all())
+
+
+def line_revenue():
+    return OrderDetails.unit_price * OrderDetails.quantity * (1 - OrderDetails.discount)
+
+
+def get_customer_order_totals(customer_id: str) -> Row:
+    """Order count, revenue and first and last order date of a customer, in one aggregate query."""
+    return db.session.execute(
+        select(func.count(distinct(Order.order_id)).label("order_count"),
+               func.coalesce(func.sum(line_revenue()), 0).label("revenue"),
+               func.min(Order.order_date).label("first_order_date"),
+               func.max(Order.order_date).label("last_order_date"))
+        .select_from(Order)
+        .outerjoin(OrderDetails, OrderDetails.order_id == Order.order_id)
+        .where(Order.customer_id == customer_id)
+    ).one()
+
+
+def get_customer_top_products(customer_id: str, limit: int) -> List[Row]:
+    """The products a customer spent the most on, with the quantity bought and the revenue."""
+    revenue = func.sum(line_revenue()).label("revenue")
+    return db.session.execute(
+        select(Product.product_id, Product.product_name,
+               func.sum(OrderDetails.quantity).label("quantity"), revenue)
+        .select_from(Order)
+        .join(OrderDetails, OrderDetails.order_id == Order.order_id)
+        .join(Product, Product.product_id == OrderDetails.product_id)
+        .where(Order.customer_id == customer_id)
+        .group_by(Product.product_id, Product.product_name)
+        .order_by(revenue.desc(), Product.product_id)
+        .limit(limit)
+    ).all()
+
+
+def iter_orders_with_details(order_date_from: Optional[datetime] = None,
+                             order_date_to: Optional[datetime] = None,
+                             customer_id: Optional[str] = None,
+                             ship_country: Optional[str] = None,
+                             chunk_size: int = 1000) -> Iterator[Tuple[Order, List[OrderDetails]]]:
+    """Streams matching orders with all of their details through a server-side cursor, fetching
+    `chunk_size` rows at a time so memory use does not grow with the size of the range."""
+    statement = (select(Order, OrderDetails)
+                 .outerjoin(OrderDetails, OrderDetails.order_id == Order.order_id)
+                 .order_by(Order.order_id, OrderDetails.product_id)
+                 .execution_options(yield_per=chunk_size))
+    if order_date_from is not None:
+        statement = statement.where(Order.order_date >= order_date_from)
+    if order_date_to is not None:
+        statement = statement.where(Order.order_date <= order_date_to)
+    if customer_id is not None:
+        statement = statement.where(Order.customer_id == customer_id)
+    if ship_country is not None:
+        statement = statement.where(Order.ship_country == ship_country)
+
+    result = db.session.execute(statement)
+    try:
+        for _, rows in groupby(result, key=lambda row: row[0].order_id):
+            rows = list(rows)
+            yield rows[0][0], [order_detail for _, order_detail in rows if order_detail is not None]
+    finally:
+        result.close()
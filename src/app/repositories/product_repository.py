@@ -0,0 +1,33 @@
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+
+from app.db import db
+from app.models import Product
+from app.pagination import Keyset, keyset_order_by, paginate_keyset
+from app.projection import select_columns
+
+
+DEFAULT_KEYS = [(Product.product_id, False)]
+
+
+# listings are read only, they select plain rows instead of building ORM instances
+def _products_statement(fields: Optional[List[str]], filters: Sequence = (), keys: Keyset = ()):
+    # the sort columns are selected too, the cursor of the next page is read from them
+    columns = select_columns(Product, fields, extra=[column.key for column, _ in keys])
+    return select(*columns).where(*filters)
+
+
+def get_products(page: int, page_size: int, fields: Optional[List[str]] = None, filters: Sequence = (),
+                 keys: Keyset = DEFAULT_KEYS) -> List[Row]:
+    statement = (_products_statement(fields, filters, keys)
+                 .order_by(*keyset_order_by(keys))
+                 .limit(page_size)
+                 .offset((page - 1) * page_size))
+    return db.session.execute(statement).all()
+
+
+def get_products_after(cursor: Optional[str], page_size: int, fields: Optional[List[str]] = None,
+                       filters: Sequence = (), keys: Keyset = DEFAULT_KEYS) -> Tuple[List[Row], Optional[str]]:
+    return paginate_keyset(_products_statement(fields, filters, keys), keys, cursor, page_size)
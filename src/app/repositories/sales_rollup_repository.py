@@ -0,0 +1,119 @@
+import logging as root_logger
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, delete, func, insert, literal, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import Row
+
+from app.db import db
+from app.models import Category, Employee, Order, OrderDetails, Product, SalesRollup
+from app.repositories.order_repository import line_revenue
+
+
+logger = root_logger.getLogger("northwind")
+
+KEY_COLUMNS = ("month", "product_id", "employee_id", "ship_country")
+MEASURE_COLUMNS = ("order_lines", "quantity", "revenue")
+
+
+def get_order_lines(order_ids: Iterable[int]) -> List[Row]:
+    """The order lines of the given orders with the order columns the rollup is keyed by."""
+    order_ids = set(order_ids)
+    if not order_ids:
+        return []
+    return db.session.execute(
+        select(Order.order_id, Order.order_date, Order.employee_id, Order.ship_country, OrderDetails.product_id,
+               OrderDetails.unit_price, OrderDetails.quantity, OrderDetails.discount)
+        .join(OrderDetails, OrderDetails.order_id == Order.order_id)
+        .where(Order.order_id.in_(order_ids))
+    ).all()
+
+
+def increment(rows: List[Dict]) -> None:
+    """Adds the measures of `rows` to the rollup rows with the same key, creating the missing ones."""
+    if not rows:
+        return
+    table = SalesRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(SalesRollup).values(rows)
+        statement = statement.on_duplicate_key_update(
+            {column: table.c[column] + statement.inserted[column] for column in MEASURE_COLUMNS})
+    elif dialect in ("postgresql", "sqlite"):
+        insert_for_dialect = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert_for_dialect(SalesRollup).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={column: table.c[column] + statement.excluded[column] for column in MEASURE_COLUMNS})
+    else:
+        logger.warning("No native upsert for dialect %s, incrementing sales rollups row by row", dialect)
+        for row in rows:
+            result = db.session.execute(
+                update(SalesRollup)
+                .where(and_(*[table.c[column] == row[column] for column in KEY_COLUMNS]))
+                .values({column: table.c[column] + row[column] for column in MEASURE_COLUMNS}))
+            if result.rowcount == 0:
+                db.session.execute(insert(SalesRollup).values(row))
+        return
+    db.session.execute(statement)
+
+
+def _month(dialect: str):
+    if dialect in ("mysql", "mariadb"):
+        month = func.date_format(Order.order_date, "%Y-%m")
+    elif dialect == "postgresql":
+        month = func.to_char(Order.order_date, "YYYY-MM")
+    else:
+        month = func.strftime("%Y-%m", Order.order_date)
+    return func.coalesce(month, literal(""))
+
+
+def rebuild() -> int:
+    """Recomputes every rollup row from orders and order details with one INSERT ... SELECT."""
+    month = _month(db.session.get_bind().dialect.name).label("month")
+    employee_id = func.coalesce(Order.employee_id, 0).label("employee_id")
+    ship_country = func.coalesce(Order.ship_country, "").label("ship_country")
+    aggregate = (select(month, OrderDetails.product_id, employee_id, ship_country,
+                        func.count().label("order_lines"),
+                        func.sum(OrderDetails.quantity).label("quantity"),
+                        func.sum(line_revenue()).label("revenue"))
+                 .select_from(Order)
+                 .join(OrderDetails, OrderDetails.order_id == Order.order_id)
+                 .group_by(month, OrderDetails.product_id, employee_id, ship_country))
+    db.session.execute(delete(SalesRollup))
+    db.session.execute(insert(SalesRollup).from_select(KEY_COLUMNS + MEASURE_COLUMNS, aggregate))
+    return db.session.scalar(select(func.count()).select_from(SalesRollup))
+
+
+# report dimensions, with the columns they are grouped by
+DIMENSIONS = {
+    "months": [SalesRollup.month],
+    "products": [SalesRollup.product_id, Product.product_name],
+    "categories": [Product.category_id, Category.category_name],
+    "employees": [SalesRollup.employee_id, Employee.first_name, Employee.last_name],
+    "countries": [SalesRollup.ship_country],
+}
+
+
+def get_sales(dimension: str, month_from: Optional[str] = None, month_to: Optional[str] = None) -> List[Row]:
+    revenue = func.sum(SalesRollup.revenue).label("revenue")
+    columns = DIMENSIONS[dimension]
+    statement = (select(*columns,
+                        func.sum(SalesRollup.order_lines).label("order_lines"),
+                        func.sum(SalesRollup.quantity).label("quantity"),
+                        revenue)
+                 .select_from(SalesRollup)
+                 .where(SalesRollup.order_lines > 0)
+                 .group_by(*columns))
+    if dimension in ("products", "categories"):
+        statement = statement.outerjoin(Product, Product.product_id == SalesRollup.product_id)
+    if dimension == "categories":
+        statement = statement.outerjoin(Category, Category.category_id == Product.category_id)
+    if dimension == "employees":
+        statement = statement.outerjoin(Employee, Employee.employee_id == SalesRollup.employee_id)
+    if month_from is not None:
+        statement = statement.where(SalesRollup.month >= month_from)
+    if month_to is not None:
+        statement = statement.where(SalesRollup.month <= month_to)
+    order_by = [SalesRollup.month] if dimension == "months" else [revenue.desc(), *columns]
+    return db.session.execute(statement.order_by(*order_by)).all()
@@ -0,0 +1,230 @@
+import logging as root_logger
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy import select
+
+from app.db import db
+from app.exceptions import ValidationException
+from app.models import Customer, Product
+
+
+logger = root_logger.getLogger("northwind")
+
+MIN_SIMILARITY = 0.3
+MAX_LIMIT = 50
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lower case, accents and punctuation removed, e.g. "Comércio Mineiro" -> "comercio mineiro"."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    kept = [char if char.isalnum() else " " for char in decomposed if not unicodedata.combining(char)]
+    return " ".join("".join(kept).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    # every word is padded like pg_trgm does, so the first letters of a word make trigrams of their own
+    # and short prefixes ("al", "a") still match
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+class SearchIndex:
+    """In-memory trigram index over some text fields of a table. Documents are ranked by the share of
+    the query trigrams they contain, prefix matches first."""
+
+    def __init__(self, id_field: str, fields: Sequence[str]):
+        self.id_field = id_field
+        self.fields = tuple(fields)
+        self._documents: Dict[Any, Dict] = {}
+        self._texts: Dict[Any, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[Tuple[Any, int]]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _remove(self, doc_id) -> None:
+        texts = self._texts.pop(doc_id, None)
+        self._documents.pop(doc_id, None)
+        if texts is None:
+            return
+        for field_index, text in enumerate(texts):
+            for gram in trigrams(text):
+                postings = self._postings[gram]
+                postings.discard((doc_id, field_index))
+                if not postings:
+                    del self._postings[gram]
+
+    def add(self, documents: Iterable[Dict]) -> None:
+        """Adds documents, each a dict with the id field and the indexed fields, replacing the ones
+        with the same id."""
+        with self._lock:
+            for document in documents:
+                doc_id = document[self.id_field]
+                self._remove(doc_id)
+                texts = tuple(normalize(document.get(field)) for field in self.fields)
+                self._documents[doc_id] = document
+                self._texts[doc_id] = texts
+                for field_index, text in enumerate(texts):
+                    for gram in trigrams(text):
+                        self._postings[gram].add((doc_id, field_index))
+
+    def remove(self, doc_ids: Iterable) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+    def search(self, query: str, limit: int) -> List[Dict]:
+        text = normalize(query)
+        query_grams = trigrams(text)
+        if not query_grams:
+            return []
+
+        with self._lock:
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._postings.get(gram, ()))
+
+            best: Dict[Any, Tuple[int, float]] = {}
+            for (doc_id, field_index), count in shared.items():
+                similarity = count / len(query_grams)
+                if similarity < MIN_SIMILARITY:
+                    continue
+                field_text = self._texts[doc_id][field_index]
+                if field_text.startswith(text):
+                    prefix = 2
+                elif f" {text}" in f" {field_text}":
+                    prefix = 1
+                else:
+                    prefix = 0
+                best[doc_id] = max(best.get(doc_id, (0, 0.0)), (prefix, similarity))
+
+            ranked = sorted(best.items(), key=lambda item: (-item[1][0], -item[1][1], str(item[0])))[:limit]
+            return [dict(self._documents[doc_id]) for doc_id, _ in ranked]
+
+
+# searchable tables: index name -> (model, indexed fields)
+INDEXED = {
+    "customers": (Customer, ("company_name", "contact_name")),
+    "products": (Product, ("product_name",)),
+}
+
+
+def _documents(name: str, ids: Optional[Iterable] = None) -> List[Dict]:
+    model, fields = INDEXED[name]
+    primary_key = getattr(model, model.__mapper__.primary_key[0].key)
+    statement = select(primary_key, *[getattr(model, field) for field in fields])
+    if ids is not None:
+        statement = statement.where(primary_key.in_(set(ids)))
+    return [dict(row._mapping) for row in db.session.execute(statement)]
+
+
+class _Entry:
+    def __init__(self):
+        self.index: Optional[SearchIndex] = None
+        self.expires_at = 0.0
+        self.rebuilding = False
+        # ids written while a rebuild reads the table, the rebuilt index re-reads them before it is used
+        self.pending: Set = set()
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+
+
+def init_app(app: Flask) -> None:
+    app.extensions["northwind_search"] = {}
+
+
+def _build(name: str, entry: _Entry) -> None:
+    started = time.perf_counter()
+    model, fields = INDEXED[name]
+    index = SearchIndex(model.__mapper__.primary_key[0].key, fields)
+    index.add(_documents(name))
+    while True:
+        with entry.lock:
+            ids, entry.pending = entry.pending, set()
+            if not ids:
+                entry.index = index
+                entry.expires_at = time.monotonic() + current_app.config["SEARCH_INDEX_TTL"]
+                entry.rebuilding = False
+                break
+        index.add(_documents(name, ids))
+    logger.info("Built %s search index of %s documents in %.1f ms",
+                name, len(index), (time.perf_counter() - started) * 1000)
+
+
+def _rebuild_in_background(app: Flask, name: str, entry: _Entry) -> None:
+    with app.app_context():
+        try:
+            _build(name, entry)
+        except Exception:
+            logger.exception("Could not rebuild the %s search index", name)
+            with entry.lock:
+                entry.rebuilding = False
+
+
+def get_index(name: str) -> SearchIndex:
+    """The search index of `name`, built from the database on first use. Once it is older than
+    SEARCH_INDEX_TTL seconds (to pick up the writes of other processes) it is rebuilt in a background
+    thread, searches are served by the previous index meanwhile."""
+    entries = current_app.extensions.setdefault("northwind_search", {})
+    entry = entries.get(name) or entries.setdefault(name, _Entry())
+    if entry.index is None:
+        # nothing to serve yet, the first searches wait for the first build
+        with entry.build_lock:
+            if entry.index is None:
+                with entry.lock:
+                    entry.rebuilding = True
+                try:
+                    _build(name, entry)
+                except Exception:
+                    with entry.lock:
+                        entry.rebuilding = False
+                    raise
+    index = entry.index
+    if entry.expires_at <= time.monotonic():
+        with entry.lock:
+            stale = not entry.rebuilding
+            if stale:
+                entry.rebuilding = True
+        if stale:
+            threading.Thread(target=_rebuild_in_background, args=(current_app._get_current_object(), name, entry),
+                             name=f"northwind-search-{name}", daemon=True).start()
+    return index
+
+
+def reindex(name: str, ids: Iterable) -> None:
+    """Updates the documents of the given ids after they were written. An index that was not built yet
+    is left alone, it reads every document when it is."""
+    entry = current_app.extensions.get("northwind_search", {}).get(name)
+    ids = set(ids)
+    if entry is None or not ids:
+        return
+    with entry.lock:
+        if entry.rebuilding:
+            entry.pending.update(ids)
+    if entry.index is not None:
+        entry.index.add(_documents(name, ids))
+
+
+def search(name: str, query: Optional[str], limit: str = "10") -> List[Dict]:
+    if query is None or len(normalize(query)) == 0:
+        logger.error("Missing search query")
+        raise ValidationException("Search query q is required")
+    if not limit.isdigit() or not 0 < int(limit) <= MAX_LIMIT:
+        logger.error("Invalid search limit: %s", limit)
+        raise ValidationException(f"Invalid limit {limit}, limit should be a number from 1 to {MAX_LIMIT}")
+
+    started = time.perf_counter()
+    results = get_index(name).search(query, int(limit))
+    logger.debug("Searched %s for '%s' in %.2f ms", name, query, (time.perf_counter() - started) * 1000)
+    return results
@@ -0,0 +1,83 @@
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, LargeBinary, inspect
+
+from app.models import Category, Product, Supplier
+
+
+# models whose responses expose only some of their columns, the others serialize every column
+_FIELDS = {
+    Category: ("category_id", "category_name", "description"),
+    Supplier: ("supplier_id", "company_name"),
+}
+
+_CONVERTERS = {
+    (Product, "discontinued"): lambda value: value == 1,
+}
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _decode(value):
+    return value.decode("utf-8") if value else None
+
+
+def default_fields(model) -> Tuple[str, ...]:
+    return _FIELDS.get(model) or tuple(column.key for column in inspect(model).column_attrs)
+
+
+def _converter(model, name: str) -> Optional[Callable]:
+    converter = _CONVERTERS.get((model, name))
+    if converter is not None:
+        return converter
+    column_type = inspect(model).column_attrs[name].columns[0].type
+    if isinstance(column_type, DateTime):
+        return _isoformat
+    if isinstance(column_type, LargeBinary):
+        return _decode
+    return None
+
+
+@lru_cache(maxsize=None)
+def serializer_for(model, fields: Optional[Tuple[str, ...]] = None, rows: bool = False) -> Callable[[object], Dict]:
+    """Returns a function turning an instance of `model` into the dict its `to_dict()` builds, restricted
+    to `fields` if given. The function is generated once per model and field list: it reads loaded
+    attributes straight from the instance dict and only goes through the attribute (and so a lazy load)
+    for expired or deferred ones. With `rows` it reads the values from the named rows a Core
+    `select(*columns)` returns instead, by column name."""
+    namespace = {}
+    values = []
+    for name in default_fields(model) if fields is None else fields:
+        if rows:
+            value = f"obj.{name}"
+        else:
+            value = f"(values[{name!r}] if {name!r} in values else obj.{name})"
+        converter = _converter(model, name)
+        if converter is not None:
+            namespace[f"_convert_{name}"] = converter
+            value = f"_convert_{name}({value})"
+        values.append(f"        {name!r}: {value},")
+
+    source = "\n".join([
+        "def serialize(obj):",
+        *([] if rows else ["    values = obj.__dict__"]),
+        "    return {",
+        *values,
+        "    }",
+    ])
+    exec(compile(source, f"<serializer {model.__name__}>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+def serialize(obj, fields: Optional[Iterable[str]] = None) -> Dict:
+    return serializer_for(type(obj), tuple(fields) if fields is not None else None)(obj)
+
+
+def serialize_all(objs: List, fields: Optional[Iterable[str]] = None) -> List[Dict]:
+    if not objs:
+        return []
+    serializer = serializer_for(type(objs[0]), tuple(fields) if fields is not None else None)
+    return [serializer(obj) for obj in objs]
@@ -0,0 +1,97 @@
+import logging as root_logger
+from typing import List, Dict
+
+from app.async_db import get_async_db
+from app.exceptions import *
+from app.models import Order, OrderDetails
+from app.reference_data import get_reference_data
+from app.repositories import async_repository
+from app.serializers import serialize, serialize_all
+from app.services import order_service, product_service
+
+
+logger = root_logger.getLogger("northwind")
+
+
+def _parse_page(page: str) -> int:
+    if not page.isdigit() or int(page) <= 0:
+        logger.error("Invalid page number: %s", page)
+        raise InvalidPageException(f"Invalid page {page}, page should be a number starting from 1")
+    return int(page)
+
+
+def _related(orders: List[Order], details_by_order: Dict[int, List[OrderDetails]]) -> Dict[str, Dict]:
+    # customers and employees were eagerly loaded with the orders on the async session
+    return {
+        "customers": {order.customer_id: serialize(order.customer) for order in orders if order.customer},
+        "employees": {order.employee_id: order.employee.to_summary_dict() for order in orders if order.employee},
+        "order_details": {order_id: serialize_all(order_details)
+                          for order_id, order_details in details_by_order.items()},
+    }
+
+
+async def refresh_reference_data() -> None:
+    """Reloads the categories, suppliers and shippers through the async engine once they have expired,
+    so that serializing the rows below never queries the sync engine from the event loop."""
+    reference_data = get_reference_data()
+    if reference_data.expired:
+        await get_async_db().run(reference_data.load_async)
+
+
+async def get_all_customers(page: str = "1", page_size: int = 15) -> List[Dict]:
+    page = _parse_page(page)
+    customers = await get_async_db().run(lambda session: async_repository.get_customers(session, page, page_size))
+    return serialize_all(customers)
+
+
+async def get_customer(customer_id: str) -> Dict:
+    customer = await get_async_db().run(lambda session: async_repository.get_customer(session, customer_id))
+    if customer is None:
+        logger.error("customer not found with id '%s'", customer_id)
+        raise ResourceNotFoundException(f"customer not found with id {customer_id}")
+    return serialize(customer)
+
+
+async def get_customer_orders(customer_id: str, page: str = "1", page_size: int = 15) -> List[Dict]:
+    page = _parse_page(page)
+    result = await get_async_db().run(
+        lambda session: async_repository.get_customer_orders(session, customer_id, page, page_size))
+    if result is None:
+        logger.error("customer not found with id '%s'", customer_id)
+        raise ResourceNotFoundException(f"customer not found with id {customer_id}")
+    orders, details_by_order = result
+    await refresh_reference_data()
+    return order_service.orders_to_dicts(orders, related=_related(orders, details_by_order))
+
+
+async def get_all_products(page: str = "1", page_size: int = 10) -> List[Dict]:
+    page = _parse_page(page)
+    products = await get_async_db().run(lambda session: async_repository.get_products(session, page, page_size))
+    await refresh_reference_data()
+    return product_service.products_to_dicts(products)
+
+
+async def get_product(product_id: int) -> Dict:
+    product = await get_async_db().run(lambda session: async_repository.get_product(session, product_id))
+    if product is None:
+        logger.error("product not found with id '%s'", product_id)
+        raise ResourceNotFoundException(f"product not found with id {product_id}")
+    await refresh_reference_data()
+    return product_service.products_to_dicts([product])[0]
+
+
+async def get_all_orders(page: str = "1", page_size: int = 10) -> List[Dict]:
+    page = _parse_page(page)
+    orders, details_by_order = await get_async_db().run(
+        lambda session: async_repository.get_orders(session, page, page_size))
+    await refresh_reference_data()
+    return order_service.orders_to_dicts(orders, related=_related(orders, details_by_order))
+
+
+async def get_order(order_id: int) -> Dict:
+    orders, details_by_order = await get_async_db().run(lambda session: async_repository.get_order(session, order_id))
+    if not orders:
+        logger.error("order not found with id '%s'", order_id)
+        raise ResourceNotFoundException(f"order not found with id {order_id}")
+    await refresh_reference_data()
+    return order_service.orders_to_dicts(orders, related=_related(orders, details_by_order))[0]
@@ -0,0 +1,144 @@
+import json
+import logging as root_logger
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.db import db
+from app.exceptions import ValidationException
+
+
+logger = root_logger.getLogger("northwind")
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def parse_payload(body: bytes, mimetype: str) -> List[Any]:
+    """Reads a bulk payload which is either a JSON array or newline-delimited JSON objects."""
+    try:
+        if mimetype == "application/x-ndjson":
+            return [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+        rows = json.loads(body)
+    except ValueError:
+        raise ValidationException("Invalid bulk payload, expected a JSON array or NDJSON")
+    if not isinstance(rows, list):
+        raise ValidationException("Invalid bulk payload, expected a JSON array or NDJSON")
+    return rows
+
+
+def _chunks(rows: List[Dict], chunk_size: int):
+    for start in range(0, len(rows), chunk_size):
+        yield rows[start:start + chunk_size]
+
+
+def _generated_ids(model, pk_name: str, chunk: List[Dict]) -> List:
+    pk_column = getattr(model, pk_name)
+    dialect = db.session.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        statement = insert(model).returning(pk_column, sort_by_parameter_order=True)
+        return list(db.session.execute(statement, chunk).scalars())
+    # MySQL has no RETURNING but reports the first id of a multi-row INSERT, InnoDB allocates the ids
+    # of an insert whose row count is known up front in one consecutive run
+    result = db.session.execute(insert(model).values(chunk))
+    step = db.session.execute(text("SELECT @@auto_increment_increment")).scalar() if dialect.name in (
+        "mysql", "mariadb") else 1
+    return [result.lastrowid + index * step for index in range(len(chunk))]
+
+
+def _insert_rows(model, pk_name: str, rows: List[Dict], chunk_size: int) -> None:
+    """Inserts the rows in chunks, setting the generated primary key on the rows which had none."""
+    # a multi-row VALUES clause needs every row to have the same keys
+    rows_by_keys: Dict[tuple, List[Dict]] = {}
+    for row in rows:
+        rows_by_keys.setdefault(tuple(row.keys()), []).append(row)
+    for keys, same_key_rows in rows_by_keys.items():
+        for chunk in _chunks(same_key_rows, chunk_size):
+            if pk_name in keys:
+                db.session.execute(insert(model).values(chunk))
+                continue
+            for row, generated_id in zip(chunk, _generated_ids(model, pk_name, chunk)):
+                row[pk_name] = generated_id
+
+
+def _upsert_rows(model, pk_name: str, rows: List[Dict], chunk_size: int) -> None:
+    dialect = db.session.get_bind().dialect.name
+    for chunk in _chunks(rows, chunk_size):
+        if dialect in ("mysql", "mariadb"):
+            statement = mysql.insert(model).values(chunk)
+            statement = statement.on_duplicate_key_update(
+                {key: statement.inserted[key] for key in chunk[0] if key != pk_name})
+        elif dialect in ("postgresql", "sqlite"):
+            insert_for_dialect = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            statement = insert_for_dialect(model).values(chunk)
+            statement = statement.on_conflict_do_update(
+                index_elements=[pk_name],
+                set_={key: statement.excluded[key] for key in chunk[0] if key != pk_name})
+        else:
+            logger.warning("No native upsert for dialect %s, falling back to update by primary key", dialect)
+            db.session.execute(update(model), chunk)
+            continue
+        db.session.execute(statement)
+
+
+def write_rows(model, pk_name: str, payload: List[Any], build_row: Callable[[Dict], Dict],
+               upsert: bool = False, chunk_size: Optional[int] = None,
+               before_commit: Optional[Callable[[List[Dict]], None]] = None) -> List[Dict]:
+    """Validates every row with `build_row`, checks which primary keys already exist with one IN query
+    and writes the valid rows in chunks of `chunk_size`, all in one transaction. `before_commit` is
+    called with the results once the rows are written, to make related writes in the same transaction.
+    Returns one result per input row, in input order, with the generated id of the rows sent without one."""
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    results: List[Dict] = []
+    valid_rows: List[Dict] = []
+    # the results of the valid rows, in the same order
+    valid_results: List[Dict] = []
+    seen_ids = set()
+    for index, data in enumerate(payload):
+        try:
+            if not isinstance(data, dict):
+                raise ValidationException("Row should be a JSON object")
+            row = build_row(data)
+        except ValidationException as e:
+            results.append({"index": index, "status": "failed", "error": e.msg})
+            continue
+        row_id = row.get(pk_name)
+        if row_id is not None and row_id in seen_ids:
+            results.append({"index": index, "status": "failed", "id": row_id, "error": f"Duplicate id {row_id} in batch"})
+            continue
+        seen_ids.add(row_id)
+        results.append({"index": index, "status": "created", "id": row_id})
+        valid_rows.append(row)
+        valid_results.append(results[-1])
+
+    pk_column = getattr(model, pk_name)
+    ids = [row[pk_name] for row in valid_rows if row.get(pk_name) is not None]
+    existing_ids = set(db.session.scalars(select(pk_column).where(pk_column.in_(ids))).all()) if ids else set()
+    logger.debug("%s of %s rows already exist in %s", len(existing_ids), len(payload), model.__tablename__)
+
+    new_rows, upserted_rows = [], []
+    for result in results:
+        if result["status"] != "created" or result["id"] not in existing_ids:
+            continue
+        if upsert:
+            result["status"] = "updated"
+        else:
+            result["status"] = "failed"
+            result["error"] = f"Resource already exists with id {result['id']}"
+    for row in valid_rows:
+        if row.get(pk_name) in existing_ids:
+            if upsert:
+                upserted_rows.append(row)
+        else:
+            new_rows.append(row)
+
+    _insert_rows(model, pk_name, new_rows, chunk_size)
+    for result, row in zip(valid_results, valid_rows):
+        result["id"] = row.get(pk_name)
+    _upsert_rows(model, pk_name, upserted_rows, chunk_size)
+    if before_commit is not None:
+        before_commit(results)
+    logger.debug("Committing %s inserted and %s updated rows", len(new_rows), len(upserted_rows))
+    db.session.commit()
+
+    return results
@@ -1,18 +1,34 @@
 import logging as root_logger
-from typing import List, Dict
-
-from sqlalchemy.orm import joinedload
+from typing import List, Dict, Mapping, Optional, Union
 
+from app import search
+from app.cache import MISSING, get_cache, invalidate
 from app.models import Customer, Order
 from app.exceptions import *
+from app.filtering import parse_filters, parse_sort
 from app.db import db
-from app.repositories import customer_repository
+from app.projection import parse_fields, project, project_all, project_dict
+from app.repositories import customer_repository, order_repository
+from app.services import bulk_service, order_service
 
 
 logger = root_logger.getLogger("northwind")
 
+SUMMARY_TOP_PRODUCTS = 5
+
+
+def get_all_customers(page: str = "1", page_size: int = 15, cursor: Optional[str] = None,
+                      fields: Optional[str] = None, filters: Optional[Mapping[str, str]] = None,
+                      sort: Optional[str] = None) -> Union[List[Dict], Dict]:
+    fields = parse_fields(Customer, fields)
+    filters = parse_filters(Customer, filters)
+    keys = parse_sort(Customer, sort)
+    if cursor is not None:
+        logger.debug("Requested customers after cursor '%s' with page size %s", cursor, page_size)
+        customers, next_cursor = customer_repository.get_customers_after(
+            cursor, page_size, fields=fields, filters=filters, keys=keys)
+        return {"items": project_all(Customer, customers, fields), "next_cursor": next_cursor}
 
-def get_all_customers(page: str = "1", page_size: int = 15) -> List[Dict]:
     if not page.isdigit():
         logger.error("Invalid page number, and it is not a digit: %s", page)
         raise InvalidPageException(f"Invalid page {page}, page should be a number starting from 1")
@@ -23,26 +39,38 @@ def get_all_customers(page: str = "1", page_size: int = 15) -> List[Dict]:
 
     logger.debug("Requested page is: %s", page)
     logger.debug("Requested page size is: %s", page_size)
-    customers = customer_repository.get_customers(page, page_size)
+    customers = customer_repository.get_customers(page, page_size, fields=fields, filters=filters, keys=keys)
     logger.debug("Returning the customers of length: %s", len(customers))
 
-    return [customer.to_dict() for customer in customers]
+    return project_all(Customer, customers, fields)
 
 
-def get_customer(customer_id: str) -> Dict:
+def get_customer(customer_id: str, fields: Optional[str] = None) -> Dict:
     if customer_id is None or len(customer_id) == 0:
         logger.error("Requested customer id %s is invalid", customer_id)
         raise InvalidResourceIdException(f"Requested customer id {customer_id} is invalid")
+    fields = parse_fields(Customer, fields)
+
+    customers_cache = get_cache("customers")
+    customer_dict = customers_cache.get(customer_id)
+    if customer_dict is not MISSING:
+        logger.debug("Returning cached customer information for id %s", customer_id)
+        return project_dict(customer_dict, fields)
 
-    customer: Customer = customer_repository.get_customer(customer_id)
+    customer: Customer = customer_repository.get_customer(customer_id, fields=fields)
     if customer is None:
         logger.error("customer not found with id '%s'", customer_id)
         raise ResourceNotFoundException(f"customer not found with id {customer_id}")
 
+    if fields is not None:
+        # partially loaded customers are not cached
+        return project(customer, fields)
     logger.debug("Returning customer information with company name %s", customer.company_name)
-    return customer.to_dict()
+    customer_dict = customer.to_dict()
+    customers_cache.set(customer_id, customer_dict)
+    return dict(customer_dict)
 
-def add_customer(data) -> None:
+def _customer_row(data) -> Dict:
     if (not data.get('customer_id')
             or len(str(data.get('customer_id'))) == 0
             or not data.get('company_name')
@@ -50,35 +78,49 @@ def add_customer(data) -> None:
         logger.error("Customer ID and Company Name are required fields")
         raise ValidationException("Customer ID and Company Name are required fields")
 
-    customer_id = data.get('customer_id')
+    return {
+        "customer_id": data.get('customer_id'),
+        "company_name": data.get('company_name'),
+        "contact_name": data.get('contact_name'),
+        "contract_title": data.get('contract_title'),
+        "address": data.get('address'),
+        "city": data.get('city'),
+        "region": data.get('region'),
+        "postal_code": data.get('postal_code'),
+        "country": data.get('country'),
+        "phone": data.get('phone'),
+        "fax": data.get('fax'),
+    }
+
+
+def add_customer(data) -> None:
+    row = _customer_row(data)
+    customer_id = row["customer_id"]
 
-    if Customer.query.get(data.get('customer_id')):
+    if Customer.query.get(customer_id):
         logger.error("Customer already exists with id %s", customer_id)
         raise ResourceAlreadyExistsException(f"Customer already exists with id {customer_id}")
 
-    new_customer = Customer(
-        customer_id=customer_id,
-        company_name=data.get('company_name'),
-        contact_name=data.get('contact_name'),
-        contract_title=data.get('contract_title'),
-        address=data.get('address'),
-        city=data.get('city'),
-        region=data.get('region'),
-        postal_code=data.get('postal_code'),
-        country=data.get('country'),
-        phone=data.get('phone'),
-        fax=data.get('fax'),
-    )
+    new_customer = Customer(**row)
 
     logger.debug("Adding new customer to the DB session")
     db.session.add(new_customer)
 
     logger.debug("Committing the DB changes")
     db.session.commit()
+    search.reindex("customers", [customer_id])
 
     logger.debug("Customer created successfully")
 
 
+def add_customers(payload: List, upsert: bool = False, chunk_size: Optional[int] = None) -> List[Dict]:
+    logger.debug("Adding %s customers in bulk, upsert: %s", len(payload), upsert)
+    results = bulk_service.write_rows(Customer, "customer_id", payload, _customer_row, upsert, chunk_size)
+    invalidate("customers", [result["id"] for result in results if result["status"] == "updated"])
+    search.reindex("customers", [result["id"] for result in results if result["status"] != "failed"])
+    return results
+
+
 def update_customer(data, customer_id: str) -> None:
     existing_customer = Customer.query.get(customer_id)
 
@@ -92,46 +134,79 @@ def update_customer(data, customer_id: str) -> None:
 
     logger.debug("Committing any changes to the DB")
     db.session.commit()
-
-
-def get_customer_orders(customer_id: str, page = "1", page_size: int = 15) -> List[Dict]:
-    if not page.isdigit():
-        logger.error("Invalid page number, and it is not a digit: %s", page)
-        raise InvalidPageException(f"Invalid page {page}, page should be a number starting from 1")
-    page = int(page)
-    if page <= 0:
-        logger.error("Invalid page number: %s", page)
-        raise InvalidPageException(f"Invalid page {page}, page should be a number starting from 1")
+    get_cache("customers").delete(customer_id)
+    search.reindex("customers", [customer_id])
+
+
+def get_customer_orders(customer_id: str, page = "1", page_size: int = 15,
+                        cursor: Optional[str] = None, fields: Optional[str] = None) -> Union[List[Dict], Dict]:
+    fields = parse_fields(Order, fields)
+    if cursor is None:
+        if not page.isdigit():
+            logger.error("Invalid page number, and it is not a digit: %s", page)
+            raise InvalidPageException(f"Invalid page {page}, page should be a number starting from 1")
+        page = int(page)
+        if page <= 0:
+            logger.error("Invalid page number: %s", page)
+            raise InvalidPageException(f"Invalid page {page}, page should be a number starting from 1")
 
     customer: Customer = Customer.query.get(customer_id)
     if customer is None:
         logger.error("customer not found with id '%s'", customer_id)
         raise ResourceNotFoundException(f"customer not found with id {customer_id}")
 
-    logger.debug("fetching order for customer %s from page %s with page size %s", customer_id, page, page_size)
-    orders = (Order.query
-              .filter_by(customer_id=customer_id)
-              .options(
-                    joinedload(Order.customer),
-                    joinedload(Order.employee),
-                    joinedload(Order.shipper))
-              .limit(page_size)
-              .offset((page - 1) * page_size)
-              .all())
+    next_cursor = None
+    if cursor is not None:
+        logger.debug("fetching order for customer %s after cursor '%s' with page size %s", customer_id, cursor, page_size)
+        orders, next_cursor = order_repository.get_customer_orders_after(customer_id, cursor, page_size, fields)
+    else:
+        logger.debug("fetching order for customer %s from page %s with page size %s", customer_id, page, page_size)
+        orders = order_repository.get_customer_orders(customer_id, page, page_size, fields)
     logger.debug("fetched %s orders for customer %s", len(orders), customer_id)
 
-    orders_dict = []
-    for order in orders:
-        order_dict = order.to_dict()
-        order_dict["customer"] = order.customer.to_dict() if order.customer else None
-        order_dict["employee"] = order.employee.to_dict() if order.employee else None
-        order_dict["shipper"] = order.shipper.to_dict() if order.shipper else None
-        order_dict["last_10_order_details"] = [
-            order_detail.to_dict() for order_detail in order.order_details.limit(10).all()
-        ]
-
-        orders_dict.append(order_dict)
+    orders_dict = order_service.orders_to_dicts(orders, fields)
 
     logger.debug("returning the orders of the requested customer %s", customer_id)
+    if cursor is not None:
+        return {"items": orders_dict, "next_cursor": next_cursor}
     return orders_dict
 
+
+def search_customers(query: Optional[str], limit: str = "10") -> List[Dict]:
+    """Customers whose company or contact name matches `query`, even partially, best matches first."""
+    return search.search("customers", query, limit)
+
+
+def get_customer_order_summary(customer_id: str) -> Dict:
+    """Order count, lifetime revenue, first and last order date and top products of a customer,
+    aggregated by the database."""
+    summaries_cache = get_cache(order_service.CUSTOMER_SUMMARY_CACHE)
+    summary = summaries_cache.get(customer_id)
+    if summary is not MISSING:
+        logger.debug("Returning cached order summary for customer %s", customer_id)
+        return summary
+
+    if customer_repository.get_customer(customer_id) is None:
+        logger.error("customer not found with id '%s'", customer_id)
+        raise ResourceNotFoundException(f"customer not found with id {customer_id}")
+
+    totals = order_repository.get_customer_order_totals(customer_id)
+    top_products = order_repository.get_customer_top_products(customer_id, SUMMARY_TOP_PRODUCTS)
+    summary = {
+        "customer_id": customer_id,
+        "order_count": totals.order_count,
+        "revenue": round(float(totals.revenue), 2),
+        "first_order_date": totals.first_order_date.isoformat() if totals.first_order_date else None,
+        "last_order_date": totals.last_order_date.isoformat() if totals.last_order_date else None,
+        "top_products": [
+            {
+                "product_id": product.product_id,
+                "product_name": product.product_name,
+                "quantity": int(product.quantity),
+                "revenue": round(float(product.revenue), 2)
+            }
+            for product in top_products
+        ]
+    }
+    summaries_cache.set(customer_id, summary)
+    return summary
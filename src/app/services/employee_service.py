@@ -0,0 +1,38 @@
+import logging as root_logger
+from typing import Tuple
+
+from app.exceptions import *
+from app.repositories import employee_repository
+
+
+logger = root_logger.getLogger("northwind")
+
+# photos of the original Northwind database are bitmaps wrapped in a 78 bytes OLE object header
+OLE_HEADER_LENGTH = 78
+
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG", "image/png"),
+    (b"GIF8", "image/gif"),
+    (b"BM", "image/bmp"),
+]
+
+
+def _image_type(photo: bytes) -> Tuple[bytes, str]:
+    for candidate in (photo, photo[OLE_HEADER_LENGTH:]):
+        for signature, mimetype in IMAGE_SIGNATURES:
+            if candidate.startswith(signature):
+                return candidate, mimetype
+    return photo, "application/octet-stream"
+
+
+def get_employee_photo(employee_id: int) -> Tuple[bytes, str]:
+    row = employee_repository.get_employee_photo(employee_id)
+    if row is None:
+        logger.error("employee not found with id '%s'", employee_id)
+        raise ResourceNotFoundException(f"employee not found with id {employee_id}")
+    if not row.photo:
+        logger.error("employee %s has no photo", employee_id)
+        raise ResourceNotFoundException(f"employee {employee_id} has no photo")
+
+    return _image_type(row.photo)
@@ -0,0 +1,325 @@
+import logging as root_logger
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional, Set
+
+from flask import current_app
+from sqlalchemy import insert, select
+from app.cache import MISSING, get_cache, invalidate
+from app.db import db
+from app.exceptions import ResourceNotFoundException, ValidationException
+from app.fanout import fan_out
+from app.models import Customer, Order, OrderDetails, Product
+from app.projection import load_only_columns, parse_fields, project_all, project_dict, wants
+from app.reference_data import get_reference_data
+from app.repositories import customer_repository, employee_repository, order_repository
+from app.serializers import serializer_for
+from app.services import bulk_service, sales_rollup_service
+
+
+logger = root_logger.getLogger("northwind")
+
+# per customer order totals served by customer_service.get_customer_order_summary
+CUSTOMER_SUMMARY_CACHE = "customer_order_summaries"
+
+
+def order_loader_options(fields: Optional[List[str]], extra=()) -> List:
+    """Loader options for order queries, only the requested columns are selected."""
+    return [] if fields is None else [load_only_columns(Order, fields, extra)]
+
+
+def _customers_by_id(customer_ids: Set[str]) -> Dict[str, Dict]:
+    customers = customer_repository.get_customers_by_ids(customer_ids)
+    return {customer["customer_id"]: customer for customer in project_all(Customer, customers, None)}
+
+
+def _employees_by_id(employee_ids: Set[int]) -> Dict[int, Dict]:
+    return {employee.employee_id: employee.to_summary_dict()
+            for employee in employee_repository.get_employee_summaries(employee_ids)}
+
+
+def _order_details_by_order(order_ids: List[int]) -> Dict[int, List[Dict]]:
+    details_by_order = order_repository.get_order_details_for_orders(order_ids)
+    return {order_id: project_all(OrderDetails, order_details, None)
+            for order_id, order_details in details_by_order.items()}
+
+
+def load_related(orders: List[Order], fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Loads the customers, employees and order details of the given orders, in the request's session
+    unless FANOUT_MAX_WORKERS lets the independent queries run concurrently (see fan_out)."""
+    tasks = {}
+    # the lookup columns are only selected when the nested objects are requested
+    if wants(fields, "customer"):
+        customer_ids = {order.customer_id for order in orders if order.customer_id is not None}
+        if customer_ids:
+            tasks["customers"] = lambda: _customers_by_id(customer_ids)
+    if wants(fields, "employee"):
+        employee_ids = {order.employee_id for order in orders if order.employee_id is not None}
+        if employee_ids:
+            tasks["employees"] = lambda: _employees_by_id(employee_ids)
+    if wants(fields, "last_10_order_details") and orders:
+        tasks["order_details"] = lambda: _order_details_by_order([order.order_id for order in orders])
+
+    related = {"customers": {}, "employees": {}, "order_details": {}}
+    related.update(fan_out(tasks))
+    logger.debug("loaded %s related to %s orders", ", ".join(tasks) or "nothing", len(orders))
+    return related
+
+
+def orders_to_dicts(orders: List[Order], fields: Optional[List[str]] = None,
+                    related: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    reference_data = get_reference_data()
+    if related is None:
+        related = load_related(orders, fields)
+
+    orders_dict = project_all(Order, orders, fields)
+    for order, order_dict in zip(orders, orders_dict):
+        if wants(fields, "customer"):
+            order_dict["customer"] = related["customers"].get(order.customer_id)
+        if wants(fields, "employee"):
+            order_dict["employee"] = related["employees"].get(order.employee_id)
+        if wants(fields, "shipper"):
+            order_dict["shipper"] = reference_data.shipper(order.ship_via)
+        if wants(fields, "last_10_order_details"):
+            order_dict["last_10_order_details"] = related["order_details"].get(order.order_id, [])
+
+    return orders_dict
+
+
+def order_to_dict(order: Order, fields: Optional[List[str]] = None) -> Dict:
+    return orders_to_dicts([order], fields)[0]
+
+
+def _with_related(order_dict: Dict) -> Dict:
+    """A cached order with its customer, employee and shipper attached. They are read from their own
+    caches, which the customer writes invalidate, so a renamed customer shows up in its orders too."""
+    customer_id, employee_id = order_dict["customer_id"], order_dict["employee_id"]
+    customers_cache = get_cache("customers")
+    customer = customers_cache.get(customer_id) if customer_id is not None else None
+    if customer is MISSING:
+        customer = _customers_by_id({customer_id}).get(customer_id)
+        if customer is not None:
+            customers_cache.set(customer_id, customer)
+    employees_cache = get_cache("employee_summaries")
+    employee = employees_cache.get(employee_id) if employee_id is not None else None
+    if employee is MISSING:
+        employee = _employees_by_id({employee_id}).get(employee_id)
+        if employee is not None:
+            employees_cache.set(employee_id, employee)
+
+    result = {key: value for key, value in order_dict.items() if key != "last_10_order_details"}
+    result["customer"] = dict(customer) if customer is not None else None
+    result["employee"] = dict(employee) if employee is not None else None
+    result["shipper"] = get_reference_data().shipper(order_dict["ship_via"])
+    result["last_10_order_details"] = [dict(detail) for detail in order_dict["last_10_order_details"]]
+    return result
+
+
+def get_order(order_id: int, fields: Optional[str] = None) -> Dict:
+    fields = parse_fields(Order, fields)
+    orders_cache = get_cache("orders")
+    order_dict = orders_cache.get(order_id)
+    if order_dict is not MISSING:
+        return project_dict(_with_related(order_dict), fields)
+
+    order = Order.query.options(*order_loader_options(fields)).get(order_id)
+    if order is None:
+        logger.error("order not found with id '%s'", order_id)
+        raise ResourceNotFoundException(f"order not found with id {order_id}")
+
+    order_dict = order_to_dict(order, fields)
+    if fields is None:
+        # partially loaded orders are not cached. Only what the order writes invalidate is cached,
+        # the customer and the employee go to their own caches
+        cached = {key: value for key, value in order_dict.items() if key not in ("customer", "employee", "shipper")}
+        cached["last_10_order_details"] = [dict(detail) for detail in order_dict["last_10_order_details"]]
+        orders_cache.set(order_id, cached)
+        if order_dict["customer"] is not None:
+            get_cache("customers").set(order.customer_id, dict(order_dict["customer"]))
+        if order_dict["employee"] is not None:
+            get_cache("employee_summaries").set(order.employee_id, dict(order_dict["employee"]))
+    return order_dict
+
+
+def _parse_date(name: str, value: Optional[str]) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        logger.error("Invalid %s: %s", name, value)
+        raise ValidationException(f"Invalid {name} {value}, it should be an ISO 8601 date")
+
+
+def export_orders(filters: Dict[str, str], chunk_size: int = 1000) -> Iterator[str]:
+    """Validates the export filters up front and returns a generator of NDJSON lines,
+    one order with all of its details per line."""
+    order_date_from = _parse_date("order_date_from", filters.get("order_date_from"))
+    order_date_to = _parse_date("order_date_to", filters.get("order_date_to"))
+    orders = order_repository.iter_orders_with_details(
+        order_date_from=order_date_from,
+        order_date_to=order_date_to,
+        customer_id=filters.get("customer_id"),
+        ship_country=filters.get("ship_country"),
+        chunk_size=chunk_size)
+
+    serialize_order = serializer_for(Order)
+    serialize_order_detail = serializer_for(OrderDetails)
+
+    def generate():
+        dumps = current_app.json.dumps
+        exported = 0
+        for order, order_details in orders:
+            order_dict = serialize_order(order)
+            order_dict["order_details"] = [serialize_order_detail(order_detail) for order_detail in order_details]
+            exported += 1
+            yield dumps(order_dict) + "\n"
+        logger.debug("exported %s orders", exported)
+
+    return generate()
+
+
+def _order_row(data) -> Dict:
+    required_fields = ['order_date', 'ship_via']
+    for field in required_fields:
+        if field not in data:
+            logger.error("Missing required field for order: %s", field)
+            raise ValidationException(f"Missing required field: {field}")
+
+    row = {
+        "customer_id": data.get('customer_id'),
+        "employee_id": data.get('employee_id'),
+        "order_date": _parse_date('order_date', data.get('order_date')),
+        "required_date": _parse_date('required_date', data.get('required_date')),
+        "shipped_date": _parse_date('shipped_date', data.get('shipped_date')),
+        "ship_via": data['ship_via'],
+        "freight": data.get('freight'),
+        "ship_name": data.get('ship_name'),
+        "ship_address": data.get('ship_address'),
+        "ship_city": data.get('ship_city'),
+        "ship_region": data.get('ship_region'),
+        "ship_postal_code": data.get('ship_postal_code'),
+        "ship_country": data.get('ship_country')
+    }
+    if data.get('order_id') is not None:
+        row["order_id"] = data['order_id']
+    return row
+
+
+def _order_detail_rows(details) -> List[Dict]:
+    if not isinstance(details, list):
+        logger.error("Order details should be a list, got %s", type(details).__name__)
+        raise ValidationException("Order details should be a list")
+
+    detail_rows = []
+    product_ids = set()
+    for detail in details:
+        if not isinstance(detail, dict) or 'product_id' not in detail or 'quantity' not in detail:
+            logger.error("Invalid order detail: %s", detail)
+            raise ValidationException("Every order detail requires product_id and quantity")
+        if not isinstance(detail['quantity'], int) or detail['quantity'] <= 0:
+            raise ValidationException(f"Invalid quantity {detail['quantity']} for product {detail['product_id']}")
+        if detail['product_id'] in product_ids:
+            raise ValidationException(f"Product {detail['product_id']} is repeated in order details")
+        product_ids.add(detail['product_id'])
+        detail_rows.append({
+            "product_id": detail['product_id'],
+            "unit_price": detail.get('unit_price'),
+            "quantity": detail['quantity'],
+            "discount": detail.get('discount', 0.0)
+        })
+
+    if not product_ids:
+        return detail_rows
+
+    unit_prices = dict(db.session.execute(
+        select(Product.product_id, Product.unit_price).where(Product.product_id.in_(product_ids))
+    ).all())
+    for detail_row in detail_rows:
+        if detail_row["product_id"] not in unit_prices:
+            logger.error("Product not found with id %s", detail_row["product_id"])
+            raise ValidationException(f"Product not found with id {detail_row['product_id']}")
+        if detail_row["unit_price"] is None:
+            detail_row["unit_price"] = unit_prices[detail_row["product_id"]]
+    return detail_rows
+
+
+def add_order(data) -> Dict:
+    """Creates the order header and its order lines in one transaction and returns the full order."""
+    new_order = Order(**_order_row(data))
+    detail_rows = _order_detail_rows(data.get('details', []))
+
+    logger.debug("Adding new order to the DB session")
+    db.session.add(new_order)
+    db.session.flush()
+
+    for detail_row in detail_rows:
+        detail_row["order_id"] = new_order.order_id
+    if detail_rows:
+        logger.debug("Inserting %s order details for order %s", len(detail_rows), new_order.order_id)
+        db.session.execute(insert(OrderDetails), detail_rows)
+        sales_rollup_service.add_order_lines(new_order, detail_rows)
+
+    # serialize before committing, the commit expires the order and reading it would reload it
+    order_dict = new_order.to_dict()
+
+    logger.debug("Committing the DB changes")
+    db.session.commit()
+    get_cache(CUSTOMER_SUMMARY_CACHE).delete(order_dict["customer_id"])
+
+    order_dict["order_details"] = [
+        {key: detail_row[key] for key in ("order_id", "product_id", "unit_price", "quantity", "discount")}
+        for detail_row in detail_rows
+    ]
+    return order_dict
+
+
+def add_orders(payload: List, upsert: bool = False, chunk_size: Optional[int] = None) -> List[Dict]:
+    logger.debug("Adding %s orders in bulk, upsert: %s", len(payload), upsert)
+    old_lines, old_customer_ids = [], {}
+    if upsert:
+        # upserted orders keep their details, which are counted under the old order columns, and may
+        # move to another customer whose summary changes too
+        order_ids = [data.get("order_id") for data in payload if isinstance(data, dict)]
+        order_ids = [order_id for order_id in order_ids if order_id is not None]
+        old_lines = sales_rollup_service.get_order_lines(order_ids)
+        old_customer_ids = order_repository.get_order_customer_ids(order_ids)
+
+    def update_sales_rollups(results: List[Dict]) -> None:
+        updated_ids = {result["id"] for result in results if result["status"] == "updated"}
+        if updated_ids:
+            sales_rollup_service.replace_order_lines(
+                [line for line in old_lines if line.order_id in updated_ids], updated_ids)
+
+    results = bulk_service.write_rows(Order, "order_id", payload, _order_row, upsert, chunk_size,
+                                      before_commit=update_sales_rollups)
+    invalidate("orders", [result["id"] for result in results if result["status"] == "updated"])
+    written = [result for result in results if result["status"] != "failed"]
+    invalidate(CUSTOMER_SUMMARY_CACHE, {payload[result["index"]].get("customer_id") for result in written}
+               | {old_customer_ids.get(result["id"]) for result in written if result["status"] == "updated"})
+    return results
+
+
+def update_order(data, order_id) -> Order:
+    existing_order = Order.query.get(order_id)
+
+    if not existing_order:
+        logger.error("Order not found with id %s", order_id)
+        raise ResourceNotFoundException(f"order not found with id {order_id}")
+
+    moves_lines = any(column in data for column in sales_rollup_service.ROLLUP_ORDER_COLUMNS)
+    old_lines = sales_rollup_service.get_order_lines([order_id]) if moves_lines else []
+
+    customer_ids = {existing_order.customer_id}
+    for key, value in data.items():
+        if hasattr(existing_order, key):
+            setattr(existing_order, key, value)
+    customer_ids.add(existing_order.customer_id)
+    if moves_lines:
+        sales_rollup_service.replace_order_lines(old_lines, [order_id])
+
+    logger.debug("Committing any changes to the DB")
+    db.session.commit()
+    get_cache("orders").delete(order_id)
+    invalidate(CUSTOMER_SUMMARY_CACHE, customer_ids)
+
+    return existing_order
@@ -0,0 +1,119 @@
+import logging as root_logger
+from typing import List, Dict, Optional
+
+from app import search
+from app.cache import MISSING, get_cache, invalidate
+from app.models import Product
+from app.projection import load_only_columns, parse_fields, project_all, project_dict, wants
+from app.reference_data import get_reference_data
+from app.exceptions import *
+from app.db import db
+from app.services import bulk_service
+
+
+logger = root_logger.getLogger("northwind")
+
+
+def products_query(fields: Optional[List[str]] = None):
+    if fields is None:
+        return Product.query
+    return Product.query.options(load_only_columns(Product, fields))
+
+
+def products_to_dicts(products: List[Product], fields: Optional[List[str]] = None) -> List[Dict]:
+    reference_data = get_reference_data()
+    product_dicts = project_all(Product, products, fields)
+    for product, product_dict in zip(products, product_dicts):
+        if wants(fields, "category"):
+            product_dict["category"] = reference_data.category(product.category_id)
+        if wants(fields, "supplier"):
+            product_dict["supplier"] = reference_data.supplier(product.supplier_id)
+    return product_dicts
+
+
+def get_product(product_id: int, fields: Optional[str] = None) -> Dict:
+    fields = parse_fields(Product, fields)
+    products_cache = get_cache("products")
+    product_dict = products_cache.get(product_id)
+    if product_dict is not MISSING:
+        return project_dict(product_dict, fields)
+
+    product = products_query(fields).get(product_id)
+    if product is None:
+        logger.error("product not found with id '%s'", product_id)
+        raise ResourceNotFoundException(f"product not found with id {product_id}")
+
+    product_dict = products_to_dicts([product], fields)[0]
+    if fields is None:
+        # partially loaded products are not cached
+        products_cache.set(product_id, product_dict)
+        return dict(product_dict)
+    return product_dict
+
+
+def search_products(query: Optional[str], limit: str = "10") -> List[Dict]:
+    """Products whose name matches `query`, even partially, best matches first."""
+    return search.search("products", query, limit)
+
+
+def _product_row(data) -> Dict:
+    required_fields = ['product_name', 'quantity_per_unit', 'discontinued']
+    for field in required_fields:
+        if field not in data:
+            logger.error("Missing required field for product: %s", field)
+            raise ValidationException(f"Missing required field: {field}")
+
+    row = {
+        "product_name": data['product_name'],
+        "supplier_id": data.get('supplier_id'),
+        "category_id": data.get('category_id'),
+        "quantity_per_unit": data['quantity_per_unit'],
+        "unit_price": data.get('unit_price'),
+        "units_in_stock": data.get('units_in_stock'),
+        "units_on_order": data.get('units_on_order'),
+        "reorder_level": data.get('reorder_level'),
+        "discontinued": 1 if data['discontinued'] == True else 0
+    }
+    if data.get('product_id') is not None:
+        row["product_id"] = data['product_id']
+    return row
+
+
+def add_product(data) -> Product:
+    new_product = Product(**_product_row(data))
+
+    logger.debug("Adding new product to the DB session")
+    db.session.add(new_product)
+
+    logger.debug("Committing the DB changes")
+    db.session.commit()
+    search.reindex("products", [new_product.product_id])
+
+    return new_product
+
+
+def add_products(payload: List, upsert: bool = False, chunk_size: Optional[int] = None) -> List[Dict]:
+    logger.debug("Adding %s products in bulk, upsert: %s", len(payload), upsert)
+    results = bulk_service.write_rows(Product, "product_id", payload, _product_row, upsert, chunk_size)
+    invalidate("products", [result["id"] for result in results if result["status"] == "updated"])
+    search.reindex("products", [result["id"] for result in results if result["status"] != "failed"])
+    return results
+
+
+def update_product(data, product_id) -> Product:
+    existing_product = Product.query.get(product_id)
+
+    if not existing_product:
+        logger.error("Product not found with id %s", product_id)
+        raise ResourceNotFoundException(f"Product not found with id {product_id}")
+
+    for key, value in data.items():
+        if hasattr(existing_product, key):
+            setattr(existing_product, key, value)
+
+    logger.debug("Committing any changes to the DB")
+    db.session.commit()
+    get_cache("products").delete(product_id)
+    search.reindex("products", [product_id])
+
+    return existing_product
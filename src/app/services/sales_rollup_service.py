@@ -0,0 +1,94 @@
+import logging as root_logger
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.db import db
+from app.exceptions import ValidationException
+from app.repositories import sales_rollup_repository
+
+
+logger = root_logger.getLogger("northwind")
+
+# order columns the rollup is keyed by, changing one of them moves the order lines to another rollup row
+ROLLUP_ORDER_COLUMNS = ("order_date", "employee_id", "ship_country")
+
+_MONTH = re.compile(r"^\d{4}-\d{2}$")
+
+# an order line with the order columns the rollup is keyed by, same shape as the rows of get_order_lines
+OrderLine = namedtuple("OrderLine", "order_date employee_id ship_country product_id unit_price quantity discount")
+
+
+def _key(line) -> Tuple:
+    month = line.order_date.strftime("%Y-%m") if line.order_date else ""
+    return month, line.product_id, line.employee_id or 0, line.ship_country or ""
+
+
+def _apply(lines: Iterable, sign: int, deltas: Dict[Tuple, List]) -> None:
+    for line in lines:
+        delta = deltas.setdefault(_key(line), [0, 0, 0.0])
+        delta[0] += sign
+        delta[1] += sign * line.quantity
+        delta[2] += sign * (line.unit_price or 0) * line.quantity * (1 - (line.discount or 0))
+
+
+def _increment(deltas: Dict[Tuple, List]) -> None:
+    columns = sales_rollup_repository.KEY_COLUMNS + sales_rollup_repository.MEASURE_COLUMNS
+    rows = [dict(zip(columns, key + tuple(delta))) for key, delta in deltas.items() if any(delta)]
+    logger.debug("Incrementing %s sales rollup rows", len(rows))
+    sales_rollup_repository.increment(rows)
+
+
+def add_order_lines(order, detail_rows: List[Dict]) -> None:
+    """Counts the lines of a new order, in the current transaction."""
+    lines = [OrderLine(order.order_date, order.employee_id, order.ship_country, detail_row["product_id"],
+                       detail_row["unit_price"], detail_row["quantity"], detail_row["discount"])
+             for detail_row in detail_rows]
+    deltas = {}
+    _apply(lines, 1, deltas)
+    _increment(deltas)
+
+
+def get_order_lines(order_ids: Iterable[int]) -> List:
+    return sales_rollup_repository.get_order_lines(order_ids)
+
+
+def replace_order_lines(old_lines: Iterable, order_ids: Iterable[int]) -> None:
+    """Moves the lines of rewritten orders from the rollup rows they were counted in (`old_lines`, read
+    before the write) to the ones they belong to now, in the current transaction."""
+    deltas = {}
+    _apply(old_lines, -1, deltas)
+    db.session.flush()
+    _apply(sales_rollup_repository.get_order_lines(order_ids), 1, deltas)
+    _increment(deltas)
+
+
+def rebuild() -> int:
+    row_count = sales_rollup_repository.rebuild()
+    db.session.commit()
+    logger.info("Rebuilt %s sales rollup rows", row_count)
+    return row_count
+
+
+def _parse_month(name: str, value: Optional[str]) -> Optional[str]:
+    if value is not None and not _MONTH.match(value):
+        logger.error("Invalid %s: %s", name, value)
+        raise ValidationException(f"Invalid {name} {value}, it should be a month like 1997-01")
+    return value
+
+
+def get_sales(dimension: str, month_from: Optional[str] = None, month_to: Optional[str] = None) -> List[Dict]:
+    if dimension not in sales_rollup_repository.DIMENSIONS:
+        raise ValidationException(f"Invalid dimension {dimension}, allowed dimensions are "
+                                  f"{', '.join(sales_rollup_repository.DIMENSIONS)}")
+    rows = sales_rollup_repository.get_sales(
+        dimension, _parse_month("month_from", month_from), _parse_month("month_to", month_to))
+
+    sales = []
+    for row in rows:
+        sale = dict(row._mapping)
+        sale["quantity"] = int(sale["quantity"])
+        sale["order_lines"] = int(sale["order_lines"])
+        sale["revenue"] = round(float(sale["revenue"]), 2)
+        sales.append(sale)
+    return sales
@@ -0,0 +1,8 @@
+"""ASGI entry point of the /v1/async read endpoints, e.g. `uvicorn asgi:app --workers 4` from the src
+directory, next to the WSGI app and behind the same proxy."""
+from app import create_asgi_app
+from run import setup_logging
+
+
+setup_logging()
+app = create_asgi_app()
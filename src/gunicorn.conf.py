@@ -0,0 +1,23 @@
+import multiprocessing
+import os
+
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("THREADS", 1))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# the app is created once in the master and forked into the workers, create_app disposes the
+# inherited connection pools in every forked process
+preload_app = True
+
+timeout = 30
+graceful_timeout = 30
+max_requests = 10000
+max_requests_jitter = 1000
+
+
+def post_worker_init(worker):
+    # loaded by every worker once forked, with its own connections, before it serves its first request
+    from app import reference_data
+    reference_data.preload(worker.wsgi)
@@ -2,7 +2,7 @@ import logging.config
 import os
 import pathlib
 import json
-from app import north_wind_app
+from app import create_app, reference_data
 
 def setup_logging():
     config_file = pathlib.Path(os.path.join("config", "logging_config.json"))
@@ -14,5 +14,6 @@ def setup_logging():
 
 if __name__ == "__main__":
     setup_logging()
-    north_wind_app.run(debug=True)
-
+    north_wind_app = create_app()
+    reference_data.preload(north_wind_app)
+    north_wind_app.run(debug=north_wind_app.config.get("DEBUG", False))
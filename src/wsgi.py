@@ -0,0 +1,7 @@
+"""Production entry point, e.g. `gunicorn -c gunicorn.conf.py wsgi:app` from the src directory."""
+from app import create_app
+from run import setup_logging
+
+
+setup_logging()
+app = create_app()
@@ -0,0 +1,15 @@
+import pytest
+
+from app import create_app
+from app.db import db
+
+
+@pytest.fixture
+def sqlite_app():
+    # every thread shares the single in-memory connection, queries are not fanned out
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "FANOUT_MAX_WORKERS": 1, "TESTING": True})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import event
+
+from app import create_asgi_app
+from app.db import db
+from app.models import Customer, Order, OrderDetails, Shipper
+
+
+@pytest.fixture
+def async_app(tmp_path):
+    database = tmp_path / "northwind.db"
+    app = create_asgi_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{database}",
+        "ASYNC_DATABASE_URI": f"sqlite+aiosqlite:///{database}",
+        "TESTING": True,
+    })
+    with app.flask_app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Customer(customer_id="ALFKI", company_name="Alfreds"),
+            Shipper(shipper_id=1, company_name="Speedy Express"),
+            Order(order_id=1, customer_id="ALFKI", ship_via=1),
+            OrderDetails(order_id=1, product_id=11, unit_price=14.0, quantity=12, discount=0.0),
+        ])
+        db.session.commit()
+    return app
+
+
+def get(app, *urls):
+    """Sends the GET requests concurrently on one event loop, returns their status and JSON body."""
+    async def request(url):
+        path, _, query = url.partition("?")
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": path, "query_string": query.encode()}
+        await app(scope, None, send)
+        return messages[0]["status"], json.loads(messages[1]["body"])
+
+    async def requests():
+        results = await asyncio.gather(*[request(url) for url in urls])
+        await app.flask_app.extensions["northwind_async_db"].dispose()
+        return results
+
+    return asyncio.run(requests())
+
+
+def test_get_order_through_async_engine(async_app):
+    [(status, order)] = get(async_app, "/v1/async/orders/1")
+
+    assert status == 200
+    assert order["customer"]["company_name"] == "Alfreds"
+    assert order["shipper"]["company_name"] == "Speedy Express"
+    assert [detail["product_id"] for detail in order["last_10_order_details"]] == [11]
+
+
+def test_get_customer_orders_through_async_engine(async_app):
+    orders, missing, invalid_page, unknown = get(
+        async_app, "/v1/async/customers/ALFKI/orders", "/v1/async/customers/NOPE/orders",
+        "/v1/async/customers/ALFKI/orders?page=0", "/v1/async/employees/")
+
+    assert [order["order_id"] for order in orders[1]] == [1]
+    assert missing == (400, {"error": "customer not found with id NOPE"})
+    assert invalid_page[0] == 400
+    assert unknown[0] == 404
+
+
+def test_slow_queries_are_cancelled(async_app):
+    async_db = async_app.flask_app.extensions["northwind_async_db"]
+    async_db.timeout = 0.01
+
+    async def slow_query(session):
+        await asyncio.sleep(1)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await async_db.run(slow_query)
+        await async_db.dispose()
+
+    asyncio.run(run())
+
+
+def test_async_requests_report_their_queries(async_app):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def request():
+        await async_app({"type": "http", "method": "GET", "path": "/v1/async/customers/ALFKI"}, None, send)
+        await async_app.flask_app.extensions["northwind_async_db"].dispose()
+
+    asyncio.run(request())
+
+    server_timing = [value for name, value in messages[0]["headers"] if name == b"server-timing"]
+    assert server_timing[0].startswith(b'db;desc="1 queries";dur=')
+    assert server_timing[1].startswith(b"app;dur=")
+
+
+def test_asgi_app_needs_an_async_database_uri():
+    with pytest.raises(RuntimeError, match="NORTHWIND_ASYNC_DATABASE_URI"):
+        create_asgi_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "TESTING": True})
+
+
+def test_reference_data_is_loaded_through_the_async_engine(async_app):
+    sync_statements = []
+    with async_app.flask_app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda *args: sync_statements.append(args[2]))
+    sent = []
+
+    async def receive():
+        return {"type": "lifespan.startup"} if not sent else {"type": "lifespan.shutdown"}
+
+    async def send(message):
+        sent.append(message)
+
+    async def startup():
+        await async_app({"type": "lifespan"}, receive, send)
+
+    asyncio.run(startup())
+    with async_app.flask_app.app_context():
+        shipper = async_app.flask_app.extensions["northwind_reference_data"].shipper(1)
+
+    [(status, order)] = get(async_app, "/v1/async/orders/1")
+
+    assert [message["type"] for message in sent] == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert shipper["company_name"] == "Speedy Express"
+    assert order["shipper"]["company_name"] == "Speedy Express"
+    assert sync_statements == []
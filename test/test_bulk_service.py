@@ -0,0 +1,71 @@
+import pytest
+
+from app.db import db
+from app.exceptions import ValidationException
+from app.models import Customer, Product
+from app.services import bulk_service, customer_service, product_service
+
+
+def test_parse_payload_reads_ndjson():
+    body = b'{"customer_id": "ALFKI"}\n\n{"customer_id": "ANATR"}\n'
+
+    rows = bulk_service.parse_payload(body, "application/x-ndjson")
+
+    assert rows == [{"customer_id": "ALFKI"}, {"customer_id": "ANATR"}]
+
+
+def test_parse_payload_fails_if_not_an_array():
+    with pytest.raises(ValidationException) as exc_info:
+        bulk_service.parse_payload(b'{"customer_id": "ALFKI"}', "application/json")
+
+    assert exc_info.value.msg == "Invalid bulk payload, expected a JSON array or NDJSON"
+
+
+def test_add_customers_reports_per_row_results(sqlite_app):
+    db.session.add(Customer(customer_id="ALFKI", company_name="Alfreds"))
+    db.session.commit()
+
+    results = customer_service.add_customers([
+        {"customer_id": "ALFKI", "company_name": "Alfreds Futterkiste"},
+        {"customer_id": "ANATR", "company_name": "Ana Trujillo"},
+        {"customer_id": "ANATR", "company_name": "Ana Trujillo"},
+        {"company_name": "No id"},
+        "not an object",
+    ], chunk_size=1)
+
+    assert [result["status"] for result in results] == ["failed", "created", "failed", "failed", "failed"]
+    assert results[0]["error"] == "Resource already exists with id ALFKI"
+    assert results[2]["error"] == "Duplicate id ANATR in batch"
+    assert results[3]["error"] == "Customer ID and Company Name are required fields"
+    assert db.session.get(Customer, "ALFKI").company_name == "Alfreds"
+    assert db.session.get(Customer, "ANATR").company_name == "Ana Trujillo"
+
+
+def test_add_customers_upserts_existing_rows(sqlite_app):
+    db.session.add(Customer(customer_id="ALFKI", company_name="Alfreds"))
+    db.session.commit()
+
+    results = customer_service.add_customers([
+        {"customer_id": "ALFKI", "company_name": "Alfreds Futterkiste", "country": "Germany"},
+        {"customer_id": "ANATR", "company_name": "Ana Trujillo"},
+    ], upsert=True)
+
+    assert [result["status"] for result in results] == ["updated", "created"]
+    db.session.expire_all()
+    customer = db.session.get(Customer, "ALFKI")
+    assert (customer.company_name, customer.country) == ("Alfreds Futterkiste", "Germany")
+
+
+def test_add_products_inserts_rows_with_and_without_ids(sqlite_app):
+    results = product_service.add_products([
+        {"product_id": 7, "product_name": "Chai", "quantity_per_unit": "10 boxes", "discontinued": False},
+        {"product_name": "Chang", "quantity_per_unit": "24 bottles", "discontinued": True},
+        {"product_name": "Aniseed Syrup"},
+        {"product_name": "Ikura", "quantity_per_unit": "12 jars", "discontinued": False},
+    ])
+
+    assert [result["status"] for result in results] == ["created", "created", "failed", "created"]
+    assert results[2]["error"] == "Missing required field: quantity_per_unit"
+    assert db.session.get(Product, results[0]["id"]).product_name == "Chai"
+    assert db.session.get(Product, results[1]["id"]).product_name == "Chang"
+    assert db.session.get(Product, results[3]["id"]).product_name == "Ikura"
@@ -0,0 +1,58 @@
+from unittest.mock import patch, Mock
+
+from flask import Flask
+
+from app import cache
+from app.cache import MISSING, LRUCache, LocalSharedBackend, SharedCache
+from app.models import Customer
+from app.services import customer_service
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    lru_cache = LRUCache(max_size=2)
+    lru_cache.set("a", 1)
+    lru_cache.set("b", 2)
+    lru_cache.get("a")
+    lru_cache.set("c", 3)
+
+    assert lru_cache.get("b") is MISSING
+    assert (lru_cache.get("a"), lru_cache.get("c")) == (1, 3)
+    assert lru_cache.stats() == {"backend": "local", "size": 2, "max_size": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+
+@patch("app.cache.time.monotonic")
+def test_lru_cache_expires_entries(monotonic_mock: Mock):
+    lru_cache = LRUCache(ttl=10)
+    monotonic_mock.return_value = 100
+    lru_cache.set(1, "value")
+
+    monotonic_mock.return_value = 109
+    assert lru_cache.get("1") == "value"
+    monotonic_mock.return_value = 111
+    assert lru_cache.get("1") is MISSING
+
+
+def test_shared_cache_round_trips_json_values():
+    shared_cache = SharedCache("customers", LocalSharedBackend())
+    shared_cache.set("ALFKI", {"customer_id": "ALFKI"})
+
+    assert shared_cache.get("ALFKI") == {"customer_id": "ALFKI"}
+    shared_cache.delete("ALFKI")
+    assert shared_cache.get("ALFKI") is MISSING
+
+
+@patch("app.repositories.customer_repository.get_customer")
+def test_get_customer_is_read_through_cached(get_customer_mock: Mock):
+    app = Flask("northwind-test")
+    cache.init_app(app)
+    get_customer_mock.return_value = Customer(customer_id="ALFKI", company_name="Alfreds")
+
+    with app.app_context():
+        first = customer_service.get_customer("ALFKI")
+        second = customer_service.get_customer("ALFKI")
+        cache.get_cache("customers").delete("ALFKI")
+        customer_service.get_customer("ALFKI")
+
+        assert first == second == Customer(customer_id="ALFKI", company_name="Alfreds").to_dict()
+        assert get_customer_mock.call_count == 2
+        assert cache.stats()["customers"]["hits"] == 1
@@ -0,0 +1,66 @@
+import gzip
+
+from flask import Flask, Response, stream_with_context
+
+from app import compression
+from app.http_cache import conditional_json
+
+
+def create_app():
+    app = Flask("northwind-test")
+    app.config.update(COMPRESS_ENABLED=True, COMPRESS_MIN_SIZE=100, COMPRESS_LEVEL=6, COMPRESS_BROTLI_QUALITY=4,
+                      COMPRESS_STREAM_FLUSH_SIZE=1024, COMPRESS_STREAM_FLUSH_INTERVAL=60)
+    compression.init_app(app)
+
+    @app.get("/small")
+    def small():
+        return {"order_id": 1}
+
+    @app.get("/large")
+    def large():
+        return conditional_json([{"order_id": order_id} for order_id in range(100)])
+
+    @app.get("/stream")
+    def stream():
+        lines = (f"{index}\n" for index in range(1000))
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+    return app
+
+
+def test_large_responses_are_gzipped_with_a_weak_etag():
+    client = create_app().test_client()
+
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    not_modified = client.get("/large", headers={"Accept-Encoding": "gzip",
+                                                 "If-None-Match": response.headers["ETag"]})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"].startswith('W/"')
+    assert gzip.decompress(response.data).startswith(b'[{"order_id":0}')
+    assert not_modified.status_code == 304
+
+
+def test_small_responses_and_clients_without_gzip_are_not_compressed():
+    client = create_app().test_client()
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in small.headers
+    assert "Content-Encoding" not in identity.headers
+    assert identity.headers["Vary"] == "Accept-Encoding"
+
+
+def test_streamed_responses_are_compressed_chunk_by_chunk():
+    client = create_app().test_client()
+
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    body = "".join(f"{index}\n" for index in range(1000)).encode()
+    assert gzip.decompress(response.data) == body
+    # flushed every 1024 bytes rather than every line, which would double the size
+    assert len(response.data) < len(gzip.compress(body)) * 1.2
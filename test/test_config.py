@@ -0,0 +1,35 @@
+import json
+
+from flask import Flask
+
+from app.config import load_config
+from app.pool_stats import TimedQueuePool
+
+
+def test_load_config_reads_file_then_environment(tmp_path, monkeypatch):
+    config_file = tmp_path / "northwind.json"
+    config_file.write_text(json.dumps({"DB_POOL_SIZE": 20, "DB_POOL_TIMEOUT": 5}))
+    monkeypatch.setenv("NORTHWIND_CONFIG", str(config_file))
+    monkeypatch.setenv("NORTHWIND_DB_POOL_SIZE", "40")
+    app = Flask("northwind-test")
+
+    load_config(app)
+
+    assert app.config["SQLALCHEMY_ECHO"] is False
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"] == {
+        "poolclass": TimedQueuePool,
+        "pool_size": 40,
+        "max_overflow": 10,
+        "pool_timeout": 5,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+    }
+
+
+def test_load_config_skips_pool_options_for_sqlite(monkeypatch):
+    monkeypatch.setenv("NORTHWIND_SQLALCHEMY_DATABASE_URI", "sqlite://")
+    app = Flask("northwind-test")
+
+    load_config(app)
+
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"] == {}
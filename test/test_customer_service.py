@@ -1,10 +1,12 @@
+from datetime import datetime
 from unittest.mock import patch, Mock
 
 import pytest
 
+from app.db import db
 from app.exceptions import InvalidPageException, InvalidResourceIdException
-from app.models import Customer
-from app.services import customer_service
+from app.models import Customer, Order, OrderDetails, Product
+from app.services import customer_service, order_service
 
 
 @patch("app.repositories.customer_repository.get_customers")
@@ -16,7 +18,19 @@ def test_get_all_customers(get_customers_mock: Mock):
 
     assert len(customers) == 1
     assert [customer.to_dict() for customer in expected_customers] == customers
-    get_customers_mock.assert_called_once_with(1, 15)
+    get_customers_mock.assert_called_once_with(1, 15, fields=None, filters=[], keys=[(Customer.customer_id, False)])
+
+
+@patch("app.repositories.customer_repository.get_customers_after")
+def test_get_all_customers_with_cursor(get_customers_after_mock: Mock):
+    expected_customers = [Customer(customer_id="Hello", company_name="Test")]
+    get_customers_after_mock.return_value = (expected_customers, "next")
+
+    customers = customer_service.get_all_customers(cursor="")
+
+    assert customers == {"items": [customer.to_dict() for customer in expected_customers], "next_cursor": "next"}
+    get_customers_after_mock.assert_called_once_with("", 15, fields=None, filters=[],
+                                                     keys=[(Customer.customer_id, False)])
 
 
 def test_get_all_customers_fails_if_page_is_not_a_number():
@@ -46,7 +60,7 @@ def test_get_customer(get_customer_mock: Mock):
     customer = customer_service.get_customer(customer_id)
 
     assert expected_customer.to_dict() == customer
-    get_customer_mock.assert_called_once_with(customer_id)
+    get_customer_mock.assert_called_once_with(customer_id, fields=None)
 
 
 def test_get_customer_fails_with_invalid_customer_id():
@@ -62,3 +76,38 @@ def test_get_customer_fails_with_invalid_customer_id():
     assert exc_info_1.value.msg == f"Requested customer id {invalid_customer_id_1} is invalid"
     assert exc_info_2.value.msg == f"Requested customer id {invalid_customer_id_2} is invalid"
 
+
+def test_get_customer_order_summary_aggregates_orders_and_is_invalidated_by_new_orders(sqlite_app):
+    db.session.add_all([
+        Customer(customer_id="ALFKI", company_name="Alfreds"),
+        Product(product_id=1, product_name="Chai", quantity_per_unit="10 boxes", unit_price=10.0, discontinued=0),
+        Product(product_id=2, product_name="Chang", quantity_per_unit="24 bottles", unit_price=20.0, discontinued=0),
+        Order(order_id=1, customer_id="ALFKI", ship_via=1, order_date=datetime(1996, 7, 4)),
+        Order(order_id=2, customer_id="ALFKI", ship_via=1, order_date=datetime(1997, 1, 2)),
+        OrderDetails(order_id=1, product_id=1, unit_price=10.0, quantity=3, discount=0.0),
+        OrderDetails(order_id=1, product_id=2, unit_price=20.0, quantity=1, discount=0.5),
+        OrderDetails(order_id=2, product_id=2, unit_price=20.0, quantity=2, discount=0.0),
+    ])
+    db.session.commit()
+
+    summary = customer_service.get_customer_order_summary("ALFKI")
+    order_service.add_order({"customer_id": "ALFKI", "order_date": "1998-05-06", "ship_via": 1,
+                             "details": [{"product_id": 1, "quantity": 1}]})
+
+    assert summary == {
+        "customer_id": "ALFKI",
+        "order_count": 2,
+        "revenue": 80.0,
+        "first_order_date": "1996-07-04T00:00:00",
+        "last_order_date": "1997-01-02T00:00:00",
+        "top_products": [
+            {"product_id": 2, "product_name": "Chang", "quantity": 3, "revenue": 50.0},
+            {"product_id": 1, "product_name": "Chai", "quantity": 3, "revenue": 30.0},
+        ]
+    }
+    assert customer_service.get_customer_order_summary("ALFKI")["order_count"] == 3
+
+    order_service.add_orders([{"order_id": 2, "customer_id": None, "order_date": "1997-01-02", "ship_via": 1}],
+                           upsert=True)
+
+    assert customer_service.get_customer_order_summary("ALFKI")["order_count"] == 2
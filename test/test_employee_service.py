@@ -0,0 +1,36 @@
+import pytest
+
+from app.db import db
+from app.exceptions import ResourceNotFoundException
+from app.models import Employee, Order
+from app.services import employee_service, order_service
+
+
+def test_get_employee_photo_strips_ole_header(sqlite_app):
+    bitmap = b"BM" + b"\x00" * 10
+    db.session.add(Employee(employee_id=1, last_name="Davolio", first_name="Nancy", photo=b"\x15" * 78 + bitmap))
+    db.session.commit()
+
+    assert employee_service.get_employee_photo(1) == (bitmap, "image/bmp")
+
+
+def test_get_employee_photo_fails_for_unknown_employee(sqlite_app):
+    with pytest.raises(ResourceNotFoundException) as exc_info:
+        employee_service.get_employee_photo(42)
+
+    assert exc_info.value.msg == "employee not found with id 42"
+
+
+def test_orders_embed_employee_summary_without_loading_blobs(sqlite_app):
+    db.session.add(Employee(employee_id=1, last_name="Davolio", first_name="Nancy", photo=b"\x00", notes="Education"))
+    db.session.add(Order(order_id=1, employee_id=1, ship_via=1))
+    db.session.commit()
+    db.session.expunge_all()
+
+    order = Order.query.options(*order_service.order_loader_options(None)).one()
+    order_dict = order_service.order_to_dict(order)
+
+    assert "photo" not in order.employee.__dict__
+    assert "notes" not in order.employee.__dict__
+    assert order_dict["employee"] == {"employee_id": 1, "last_name": "Davolio", "first_name": "Nancy",
+                                      "title": None, "photo_url": "/v1/employees/1/photo"}
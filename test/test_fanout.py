@@ -0,0 +1,65 @@
+import threading
+
+from app import create_app
+from app.db import db
+from app.fanout import _executor, fan_out
+from app.models import Customer, Employee, Order, OrderDetails
+from app.services import order_service
+
+
+def test_fan_out_runs_tasks_on_separate_threads_and_sessions():
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "FANOUT_MAX_WORKERS": 2})
+    with app.app_context():
+        results = fan_out({
+            "first": lambda: (threading.get_ident(), id(db.session())),
+            "second": lambda: (threading.get_ident(), id(db.session())),
+        })
+
+        assert results["first"][0] != threading.get_ident()
+        assert results["first"][1] != id(db.session())
+        assert set(results) == {"first", "second"}
+
+
+def test_orders_to_dicts_with_fanned_out_queries(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'northwind.db'}", "FANOUT_MAX_WORKERS": 3})
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Customer(customer_id="ALFKI", company_name="Alfreds"),
+            Employee(employee_id=1, last_name="Davolio", first_name="Nancy"),
+            Order(order_id=1, customer_id="ALFKI", employee_id=1, ship_via=1),
+            Order(order_id=2, ship_via=1),
+            OrderDetails(order_id=1, product_id=11, unit_price=14.0, quantity=12, discount=0.0),
+        ])
+        db.session.commit()
+
+        orders = order_service.orders_to_dicts(Order.query.order_by(Order.order_id).all())
+
+        assert orders[0]["customer"]["company_name"] == "Alfreds"
+        assert orders[0]["employee"]["first_name"] == "Nancy"
+        assert [detail["product_id"] for detail in orders[0]["last_10_order_details"]] == [11]
+        assert (orders[1]["customer"], orders[1]["employee"], orders[1]["last_10_order_details"]) == (None, None, [])
+
+
+def test_fanned_out_order_endpoint(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'northwind.db'}", "FANOUT_MAX_WORKERS": 2})
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Customer(customer_id="ALFKI", company_name="Alfreds"),
+            Employee(employee_id=1, last_name="Davolio", first_name="Nancy"),
+            Order(order_id=1, customer_id="ALFKI", employee_id=1, ship_via=1),
+            OrderDetails(order_id=1, product_id=11, unit_price=14.0, quantity=12, discount=0.0),
+        ])
+        db.session.commit()
+
+    response = app.test_client().get("/v1/orders/1")
+
+    assert response.json["customer"]["company_name"] == "Alfreds"
+    assert response.json["employee"]["first_name"] == "Nancy"
+    assert [detail["product_id"] for detail in response.json["last_10_order_details"]] == [11]
+
+
+def test_executors_follow_the_configured_size():
+    assert _executor(2) is _executor(2)
+    assert _executor(3)._max_workers == 3
@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.db import db
+from app.exceptions import ValidationException
+from app.filtering import SORTS, parse_filters, parse_sort
+from app.models import Customer, Order, Product
+from app.pagination import encode_cursor
+from app.repositories import customer_repository, order_repository, product_repository
+
+
+LISTINGS = {
+    Order: order_repository.get_orders_after,
+    Product: product_repository.get_products_after,
+    Customer: customer_repository.get_customers_after,
+}
+
+
+@contextmanager
+def capture_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def query_plan(statement, parameters) -> str:
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("model, sort", [(model, prefix + name) for model, names in SORTS.items()
+                                         for name in names for prefix in ("", "-")])
+def test_every_allowed_sort_is_served_by_an_index(sqlite_app, model, sort):
+    keys = parse_sort(model, sort)
+    cursor = encode_cursor([1] * len(keys))
+
+    with capture_statements() as statements:
+        LISTINGS[model]("", 10, keys=keys)
+        LISTINGS[model](cursor, 10, keys=keys)
+
+    for statement, parameters in statements:
+        assert "TEMP B-TREE" not in query_plan(statement, parameters), statement
+
+
+@pytest.mark.parametrize("model, args", [
+    (Order, {"ship_country": "France"}),
+    (Order, {"employee_id": "1"}),
+    (Order, {"order_date_from": "1997-01-01", "order_date_to": "1997-01-31"}),
+    (Product, {"category_id": "1"}),
+    (Product, {"unit_price_min": "10", "unit_price_max": "20"}),
+    (Customer, {"country": "Germany"}),
+    (Customer, {"city": "Berlin"}),
+])
+def test_filters_are_served_by_an_index(sqlite_app, model, args):
+    with capture_statements() as statements:
+        LISTINGS[model]("", 10, filters=parse_filters(model, args))
+
+    assert "USING INDEX" in query_plan(*statements[0])
+
+
+def test_parse_filters_rejects_unknown_filters_and_invalid_values():
+    with pytest.raises(ValidationException) as unknown_exc_info:
+        parse_filters(Customer, {"page": "1", "region": "BC"})
+    with pytest.raises(ValidationException) as invalid_exc_info:
+        parse_filters(Product, {"discontinued": "maybe"})
+
+    assert unknown_exc_info.value.msg == "Invalid filter region, allowed filters are country, city"
+    assert invalid_exc_info.value.msg == "Invalid value maybe for filter discontinued"
+
+
+def test_parse_sort_rejects_unindexed_sorts():
+    with pytest.raises(ValidationException) as exc_info:
+        parse_sort(Order, "-freight")
+
+    assert exc_info.value.msg == "Invalid sort -freight, allowed sorts are order_id, order_date"
+
+
+def test_products_are_filtered_and_sorted_in_sql(sqlite_app):
+    db.session.add_all([
+        Product(product_id=1, product_name="Chai", quantity_per_unit="10 boxes", category_id=1, unit_price=18.0,
+                discontinued=0),
+        Product(product_id=2, product_name="Chang", quantity_per_unit="24 bottles", category_id=1, unit_price=19.0,
+                discontinued=1),
+        Product(product_id=3, product_name="Aniseed Syrup", quantity_per_unit="12 bottles", category_id=2,
+                unit_price=10.0, discontinued=0),
+        Product(product_id=4, product_name="Ikura", quantity_per_unit="12 jars", category_id=1, unit_price=31.0,
+                discontinued=0),
+    ])
+    db.session.commit()
+    client = sqlite_app.test_client()
+
+    first_page = client.get("/v1/products/?category_id=1&discontinued=false&sort=-unit_price&cursor=&fields=product_id")
+    invalid = client.get("/v1/products/?color=red")
+
+    assert first_page.json == {"items": [{"product_id": 4}, {"product_id": 1}], "next_cursor": None}
+    assert invalid.status_code == 400
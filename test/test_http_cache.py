@@ -0,0 +1,26 @@
+from flask import Blueprint, Flask
+
+from app.http_cache import conditional_json
+
+
+def create_app():
+    app = Flask("northwind-test")
+    app.config["CACHE_CONTROL"] = {"customers": "private, max-age=30"}
+    customer_bp = Blueprint("customers", __name__)
+    customer_bp.get("/<customer_id>")(lambda customer_id: conditional_json({"customer_id": customer_id}))
+    app.register_blueprint(customer_bp, url_prefix="/v1/customers")
+    return app
+
+
+def test_conditional_json_returns_not_modified_for_matching_etag():
+    client = create_app().test_client()
+
+    response = client.get("/v1/customers/ALFKI")
+    not_modified = client.get("/v1/customers/ALFKI", headers={"If-None-Match": response.headers["ETag"]})
+    changed = client.get("/v1/customers/ANATR", headers={"If-None-Match": response.headers["ETag"]})
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, max-age=30"
+    assert not_modified.status_code == 304
+    assert not_modified.data == b""
+    assert changed.status_code == 200
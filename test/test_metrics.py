@@ -0,0 +1,79 @@
+import threading
+
+from app.db import db
+from app.metrics import Registry
+from app.models import Customer
+
+
+def test_registry_adds_up_the_shards_of_every_thread():
+    registry = Registry()
+    registry.describe("requests_total", "counter", "Requests.")
+    registry.describe("latency_seconds", "histogram", "Latency.", (0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            registry.inc("requests_total", (("blueprint", "orders"),))
+        registry.observe("latency_seconds", (), 0.05)
+        registry.observe("latency_seconds", (), 0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # the shards of the finished threads are folded together
+    assert len(registry._shards) == 0
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 4',
+        'latency_seconds_bucket{le="1"} 8',
+        'latency_seconds_bucket{le="+Inf"} 8',
+        "latency_seconds_sum 2.2",
+        "latency_seconds_count 8",
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{blueprint="orders"} 4000',
+    ]
+
+
+def test_histograms_are_rendered_by_labels_then_bound():
+    registry = Registry()
+    registry.describe("latency_seconds", "histogram", "Latency.", (0.5, 2.5, 10.0))
+    registry.observe("latency_seconds", (("route", "/b"),), 20.0)
+    registry.observe("latency_seconds", (("route", "/a"),), 1.0)
+
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.5"} 0',
+        'latency_seconds_bucket{route="/a",le="2.5"} 1',
+        'latency_seconds_bucket{route="/a",le="10"} 1',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 1',
+        'latency_seconds_sum{route="/a"} 1',
+        'latency_seconds_count{route="/a"} 1',
+        'latency_seconds_bucket{route="/b",le="0.5"} 0',
+        'latency_seconds_bucket{route="/b",le="2.5"} 0',
+        'latency_seconds_bucket{route="/b",le="10"} 0',
+        'latency_seconds_bucket{route="/b",le="+Inf"} 1',
+        'latency_seconds_sum{route="/b"} 20',
+        'latency_seconds_count{route="/b"} 1',
+    ]
+
+
+def test_metrics_endpoint_reports_requests_by_blueprint(sqlite_app):
+    db.session.add(Customer(customer_id="ALFKI", company_name="Alfreds Futterkiste"))
+    db.session.commit()
+    client = sqlite_app.test_client()
+    client.get("/v1/customers/ALFKI")
+    client.get("/v1/customers/ALFKI")
+    client.get("/v1/customers/NOONE")
+
+    lines = client.get("/metrics").text.splitlines()
+
+    route = 'blueprint="customers",route="/v1/customers/<customer_id>"'
+    assert f'northwind_http_requests_total{{{route},method="GET",status="200"}} 2' in lines
+    assert f'northwind_http_requests_total{{{route},method="GET",status="400"}} 1' in lines
+    assert f'northwind_http_request_duration_seconds_count{{{route},method="GET"}} 3' in lines
+    assert 'northwind_http_requests_in_flight{blueprint="customers"} 0' in lines
+    assert f'northwind_db_time_seconds_count{{{route}}} 3' in lines
+    assert 'northwind_cache_hit_ratio{cache="customers"} 0.333333' in lines
@@ -0,0 +1,154 @@
+import json
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.db import db
+from app.exceptions import ValidationException
+from app.models import Customer, Employee, Order, OrderDetails, Product, Shipper
+from app.reference_data import get_reference_data
+from app.repositories import order_repository
+from app.services import customer_service, order_service
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def add_orders(count: int):
+    db.session.add_all([
+        Customer(customer_id="ALFKI", company_name="Alfreds"),
+        Employee(employee_id=1, last_name="Davolio", first_name="Nancy"),
+        Shipper(shipper_id=1, company_name="Speedy Express"),
+    ])
+    for order_id in range(1, count + 1):
+        db.session.add(Order(order_id=order_id, customer_id="ALFKI", employee_id=1, ship_via=1,
+                             order_date=datetime(1996, 7, 4)))
+        for product_id in range(1, 13):
+            db.session.add(OrderDetails(order_id=order_id, product_id=product_id, unit_price=10.0,
+                                        quantity=1, discount=0.0))
+    db.session.commit()
+
+
+def get_page(page_size: int):
+    db.session.expunge_all()
+    orders = Order.query.limit(page_size).all()
+    return order_service.orders_to_dicts(orders)
+
+
+def test_orders_to_dicts_returns_first_10_details_per_order(sqlite_app):
+    add_orders(2)
+
+    orders = get_page(2)
+
+    assert [order["order_id"] for order in orders] == [1, 2]
+    for order in orders:
+        assert [detail["product_id"] for detail in order["last_10_order_details"]] == list(range(1, 11))
+        assert order["customer"]["customer_id"] == "ALFKI"
+        assert order["shipper"]["shipper_id"] == 1
+
+
+def test_orders_to_dicts_query_count_does_not_depend_on_page_size(sqlite_app):
+    add_orders(15)
+
+    get_reference_data().load()
+
+    with count_queries() as small_page_statements:
+        get_page(2)
+    with count_queries() as large_page_statements:
+        get_page(15)
+
+    assert len(small_page_statements) == len(large_page_statements) == 4
+
+
+def test_order_listing_rows_serialize_like_orm_instances(sqlite_app):
+    add_orders(3)
+    expected = get_page(3)
+    db.session.expunge_all()
+
+    orders = order_repository.get_orders(1, 3)
+
+    assert len(db.session.identity_map) == 0
+    assert order_service.orders_to_dicts(orders) == expected
+
+
+def test_cached_orders_follow_customer_writes_and_are_not_shared(sqlite_app):
+    add_orders(1)
+    first = order_service.get_order(1)
+    first["customer"]["company_name"] = "Changed by the caller"
+    first["last_10_order_details"].clear()
+
+    customer_service.update_customer({"company_name": "Renamed"}, "ALFKI")
+    with count_queries() as statements:
+        cached = order_service.get_order(1)
+
+    assert cached["customer"]["company_name"] == "Renamed"
+    assert cached["employee"]["last_name"] == "Davolio"
+    assert cached["shipper"]["company_name"] == "Speedy Express"
+    assert len(cached["last_10_order_details"]) == 10
+    assert list(cached) == list(first)
+    # only the customer is read again, the order and the employee come from the caches
+    assert len(statements) == 1
+
+
+def test_export_orders_streams_orders_with_all_details(sqlite_app):
+    add_orders(3)
+    db.session.get(Order, 2).ship_country = "Germany"
+    db.session.add(Order(order_id=4, customer_id="ALFKI", ship_via=1, ship_country="Germany"))
+    db.session.commit()
+
+    lines = list(order_service.export_orders({"ship_country": "Germany"}, chunk_size=5))
+
+    orders = [json.loads(line) for line in lines]
+    assert [order["order_id"] for order in orders] == [2, 4]
+    assert [detail["product_id"] for detail in orders[0]["order_details"]] == list(range(1, 13))
+    assert orders[1]["order_details"] == []
+
+
+def test_export_orders_fails_with_invalid_date():
+    with pytest.raises(ValidationException) as exc_info:
+        order_service.export_orders({"order_date_from": "yesterday"})
+
+    assert exc_info.value.msg == "Invalid order_date_from yesterday, it should be an ISO 8601 date"
+
+
+def test_add_order_creates_order_with_details(sqlite_app):
+    db.session.add_all([
+        Product(product_id=1, product_name="Chai", quantity_per_unit="10 boxes", unit_price=18.0, discontinued=0),
+        Product(product_id=2, product_name="Chang", quantity_per_unit="24 bottles", unit_price=19.0, discontinued=0),
+    ])
+    db.session.commit()
+
+    with count_queries() as statements:
+        order = order_service.add_order({
+            "order_date": "1996-07-04T00:00:00",
+            "ship_via": 1,
+            "details": [{"product_id": 1, "quantity": 5}, {"product_id": 2, "quantity": 2, "unit_price": 15.0, "discount": 0.1}]
+        })
+
+    assert len([statement for statement in statements if statement.startswith("SELECT")]) == 1
+    assert order["order_details"] == [
+        {"order_id": order["order_id"], "product_id": 1, "unit_price": 18.0, "quantity": 5, "discount": 0.0},
+        {"order_id": order["order_id"], "product_id": 2, "unit_price": 15.0, "quantity": 2, "discount": 0.1},
+    ]
+    assert OrderDetails.query.filter_by(order_id=order["order_id"]).count() == 2
+
+
+def test_add_order_fails_with_unknown_product(sqlite_app):
+    with pytest.raises(ValidationException) as exc_info:
+        order_service.add_order({"order_date": "1996-07-04", "ship_via": 1, "details": [{"product_id": 99, "quantity": 1}]})
+
+    assert exc_info.value.msg == "Product not found with id 99"
+    assert Order.query.count() == 0
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+from app.db import db
+from app.exceptions import InvalidCursorException
+from app.models import Customer, Order
+from app.pagination import encode_cursor, decode_cursor, paginate_keyset
+
+
+def test_cursor_round_trip():
+    values = [datetime(1996, 7, 4), 10248, None]
+
+    assert decode_cursor(encode_cursor(values), 3) == values
+
+
+def test_decode_cursor_fails_with_invalid_cursor():
+    with pytest.raises(InvalidCursorException) as exc_info:
+        decode_cursor("not-a-cursor", 1)
+
+    assert exc_info.value.msg == "Invalid cursor not-a-cursor"
+
+
+@pytest.mark.parametrize("values", [[[1]], [{"id": 1}], [{"dt": 1}], [{"dt": "not a date"}], [True]])
+def test_decode_cursor_fails_with_unexpected_values(values):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(encode_cursor(values), 1)
+
+
+def test_orders_listing_rejects_a_nested_list_cursor(sqlite_app):
+    response = sqlite_app.test_client().get("/v1/orders/?cursor=W1sxXV0")
+
+    assert response.status_code == 400
+
+
+def test_paginate_keyset_walks_every_row_once(sqlite_app):
+    db.session.add(Customer(customer_id="ALFKI", company_name="Alfreds"))
+    order_dates = [datetime(1996, 7, 4), None, datetime(1996, 7, 4), datetime(1996, 7, 5), None]
+    for order_id, order_date in enumerate(order_dates, start=1):
+        db.session.add(Order(order_id=order_id, customer_id="ALFKI", order_date=order_date, ship_via=1))
+    db.session.commit()
+
+    keys = [(Order.order_date, False), (Order.order_id, False)]
+    seen, cursor = [], ""
+    while cursor is not None:
+        orders, cursor = paginate_keyset(Order.query, keys, cursor, 2)
+        seen.extend(order.order_id for order in orders)
+
+    assert seen == [2, 5, 1, 3, 4]
+
+
+@pytest.mark.parametrize("url", ["/v1/products/?page=abc", "/v1/orders/?page=abc", "/v1/products/?page=0"])
+def test_listings_reject_invalid_pages(sqlite_app, url):
+    response = sqlite_app.test_client().get(url)
+
+    assert response.status_code == 400
@@ -0,0 +1,85 @@
+import marshal
+import os
+
+from app import create_app
+from app.db import db
+
+
+def create_profiled_app(tmp_path, **config):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "TESTING": True, "PROFILE_ENABLED": True,
+                      "PROFILE_DIR": str(tmp_path), **config})
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def functions(stats):
+    return {function_name for _, _, function_name in stats}
+
+
+def test_requests_are_profiled_on_demand(tmp_path):
+    client = create_profiled_app(tmp_path, PROFILE_TOKEN="secret").test_client()
+
+    plain = client.get("/v1/customers/?page=1")
+    saved = client.get("/v1/customers/?page=1", headers={"X-Profile": "save;secret"})
+    downloaded = client.get("/v1/customers/?page=1", headers={"X-Profile": "download;secret"})
+
+    assert "X-Profile" not in plain.headers
+    assert os.listdir(tmp_path) == [saved.headers["X-Profile"]]
+    with open(tmp_path / saved.headers["X-Profile"], "rb") as profile_file:
+        assert "get_all_customers" in functions(marshal.load(profile_file))
+    assert downloaded.headers["Content-Disposition"].startswith("attachment; filename=")
+    assert downloaded.headers["X-Profile-Status"] == "200"
+    assert "get_all_customers" in functions(marshal.loads(downloaded.data))
+
+
+def test_profiling_needs_the_token(tmp_path):
+    client = create_profiled_app(tmp_path, PROFILE_TOKEN="secret").test_client()
+    without_token = create_profiled_app(tmp_path).test_client()
+
+    refused = client.get("/v1/customers/?page=1", headers={"X-Profile": "save;guess"})
+    accepted = client.get("/v1/customers/?page=1", headers={"X-Profile": "save;secret"})
+    unconfigured = without_token.get("/v1/customers/?page=1", headers={"X-Profile": "save"})
+
+    assert "X-Profile" not in refused.headers
+    assert "X-Profile" in accepted.headers
+    assert "X-Profile" not in unconfigured.headers
+
+
+def test_streamed_responses_are_profiled_until_closed(tmp_path):
+    client = create_profiled_app(tmp_path, PROFILE_TOKEN="secret").test_client()
+
+    response = client.get("/v1/orders/export", headers={"X-Profile": "save;secret"})
+    assert response.data == b""
+    response.close()
+
+    [file_name] = os.listdir(tmp_path)
+    with open(tmp_path / file_name, "rb") as profile_file:
+        # the body is produced by the generator once the hooks have run
+        assert "generate" in functions(marshal.load(profile_file))
+
+    downloaded = client.get("/v1/orders/export", headers={"X-Profile": "download;secret"})
+    assert "generate" in functions(marshal.loads(downloaded.data))
+
+
+def test_only_the_latest_profiles_are_kept(tmp_path):
+    client = create_profiled_app(tmp_path, PROFILE_SAMPLE_RATE=1.0, PROFILE_MAX_FILES=2).test_client()
+
+    responses = [client.get("/v1/customers/?page=1") for _ in range(3)]
+
+    assert sorted(os.listdir(tmp_path)) == [response.headers["X-Profile"] for response in responses[1:]]
+
+
+def test_sampled_requests_are_saved(tmp_path):
+    client = create_profiled_app(tmp_path, PROFILE_SAMPLE_RATE=1.0).test_client()
+
+    client.get("/v1/customers/?page=1")
+
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_nothing_is_hooked_when_profiling_is_disabled():
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+
+    hooks = [hook for hooks in app.before_request_funcs.values() for hook in hooks]
+    assert all(hook.__module__ != "app.profiling" for hook in hooks)
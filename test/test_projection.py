@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+
+from app.db import db
+from app.exceptions import ValidationException
+from app.models import Customer, Order, Product
+from app.projection import parse_fields, project
+from app.services import order_service
+
+
+def test_parse_fields_rejects_unknown_fields():
+    with pytest.raises(ValidationException) as exc_info:
+        parse_fields(Customer, "customer_id,password")
+
+    assert exc_info.value.msg.startswith("Invalid fields password, allowed fields are customer_id, company_name")
+
+
+def test_parse_fields_returns_none_when_not_requested():
+    assert parse_fields(Order, None) is None
+    assert parse_fields(Order, " ") is None
+
+
+def test_project_converts_values_like_to_dict():
+    product = Product(product_id=1, product_name="Chai", discontinued=1)
+
+    assert project(product, ["product_name", "discontinued"]) == {"product_name": "Chai", "discontinued": True}
+
+
+def test_order_projection_is_pushed_into_the_select(sqlite_app):
+    db.session.add(Order(order_id=1, customer_id="ALFKI", ship_via=1, order_date=datetime(1996, 7, 4), ship_name="Alfreds"))
+    db.session.commit()
+    db.session.expunge_all()
+    fields = parse_fields(Order, "order_id,order_date,shipper")
+
+    order = Order.query.options(*order_service.order_loader_options(fields)).one()
+    orders = order_service.orders_to_dicts([order], fields)
+
+    assert "ship_name" not in order.__dict__
+    assert orders == [{"order_id": 1, "order_date": "1996-07-04T00:00:00", "shipper": None}]
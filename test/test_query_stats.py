@@ -0,0 +1,68 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.db import db
+from app.models import Customer
+from app.query_stats import QueryStats, QueryStatsFilter
+
+
+def test_query_stats_keep_the_slowest_statements():
+    stats = QueryStats(keep_slowest=2)
+    for duration, statement in [(0.002, "SELECT 1"), (0.005, "SELECT 2"), (0.001, "SELECT 3"), (0.004, "SELECT 4")]:
+        stats.record(statement, duration)
+
+    assert (stats.count, stats.db_time_ms) == (4, 12.0)
+    assert stats.slowest == [{"duration_ms": 5.0, "statement": "SELECT 2"},
+                             {"duration_ms": 4.0, "statement": "SELECT 4"}]
+
+
+def test_requests_report_their_queries_in_server_timing_and_the_log(sqlite_app, caplog):
+    db.session.add(Customer(customer_id="ALFKI", company_name="Alfreds Futterkiste"))
+    db.session.commit()
+
+    caplog.handler.addFilter(QueryStatsFilter())
+    with caplog.at_level(logging.DEBUG, logger="northwind"):
+        response = sqlite_app.test_client().get("/v1/customers/?page=1")
+
+    assert response.headers.getlist("Server-Timing")[0].startswith('db;desc="1 queries";dur=')
+    assert response.headers.getlist("Server-Timing")[1].startswith("app;dur=")
+    summary = next(record for record in caplog.records if record.msg == "%s %s issued %s queries in %.1f ms")
+    assert summary.query_count == 1
+    assert summary.slowest_queries[0]["statement"].startswith("SELECT")
+    # the filter adds the figures so far to every record logged while serving the request
+    assert caplog.records[0].query_count == 0
+    assert caplog.records[-1].query_count == 1
+
+
+def test_slow_queries_are_logged(caplog):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "SLOW_QUERY_THRESHOLD_MS": 0})
+
+    with app.app_context(), caplog.at_level(logging.WARNING, logger="northwind"):
+        db.create_all()
+
+    assert any(record.msg.startswith("Slow query") and "CREATE TABLE" in record.statement
+               for record in caplog.records)
+
+
+def test_failing_statements_leave_nothing_behind(sqlite_app):
+    with db.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+        connection.execute(text("SELECT 1"))
+
+        assert "query_started" not in connection.connection.info
+
+
+def test_streamed_responses_log_their_queries_once_sent(sqlite_app, caplog):
+    with caplog.at_level(logging.INFO, logger="northwind"):
+        response = sqlite_app.test_client().get("/v1/orders/export")
+        assert "Server-Timing" not in response.headers
+        response.get_data()
+        response.close()
+
+    [summary] = [record for record in caplog.records if record.msg == "%s %s issued %s queries in %.1f ms"]
+    assert summary.query_count >= 1
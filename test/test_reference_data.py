@@ -0,0 +1,38 @@
+from unittest.mock import patch, Mock
+
+from app.db import db
+from app.models import Category, Shipper, Supplier
+from app.reference_data import ReferenceData, get_reference_data, preload
+
+
+@patch("app.reference_data.time.monotonic")
+def test_reference_data_is_reloaded_after_ttl(monotonic_mock: Mock, sqlite_app):
+    db.session.add_all([
+        Category(category_id=1, category_name="Beverages", picture=b"\x00"),
+        Supplier(supplier_id=1, company_name="Exotic Liquids"),
+        Shipper(shipper_id=1, company_name="Speedy Express"),
+    ])
+    db.session.commit()
+    reference_data = ReferenceData(ttl=60)
+    monotonic_mock.return_value = 100
+
+    assert reference_data.category(1) == {"category_id": 1, "category_name": "Beverages", "description": None}
+    assert reference_data.supplier(1) == {"supplier_id": 1, "company_name": "Exotic Liquids"}
+
+    db.session.get(Shipper, 1).company_name = "United Package"
+    db.session.commit()
+    assert reference_data.shipper(1)["company_name"] == "Speedy Express"
+    monotonic_mock.return_value = 161
+    assert reference_data.shipper(1)["company_name"] == "United Package"
+    assert reference_data.shipper(2) is None
+
+
+def test_preload_loads_the_reference_data_before_the_first_request(sqlite_app):
+    db.session.add(Shipper(shipper_id=1, company_name="Speedy Express"))
+    db.session.commit()
+
+    preload(sqlite_app)
+    db.session.get(Shipper, 1).company_name = "United Package"
+    db.session.commit()
+
+    assert get_reference_data().shipper(1)["company_name"] == "Speedy Express"
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import pytest
+
+from app.db import db
+from app.exceptions import ValidationException
+from app.models import Employee, Order, OrderDetails, Product, SalesRollup
+from app.services import order_service, sales_rollup_service
+
+
+def rollup_rows():
+    return sorted((row.month, row.product_id, row.employee_id, row.ship_country, row.order_lines, row.quantity,
+                   round(row.revenue, 2)) for row in SalesRollup.query.filter(SalesRollup.order_lines > 0))
+
+
+@pytest.fixture
+def products(sqlite_app):
+    db.session.add_all([
+        Product(product_id=1, product_name="Chai", quantity_per_unit="10 boxes", unit_price=10.0, discontinued=0),
+        Product(product_id=2, product_name="Chang", quantity_per_unit="24 bottles", unit_price=20.0, discontinued=0),
+        Employee(employee_id=1, last_name="Davolio", first_name="Nancy"),
+    ])
+    db.session.commit()
+
+
+def test_add_order_and_update_order_maintain_the_rollup_incrementally(products):
+    order = order_service.add_order({
+        "order_date": "1996-07-04", "ship_via": 1, "employee_id": 1, "ship_country": "France",
+        "details": [{"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 1, "discount": 0.5}]
+    })
+    order_service.add_order({"order_date": "1996-07-20", "ship_via": 1, "employee_id": 1, "ship_country": "France",
+                             "details": [{"product_id": 1, "quantity": 3}]})
+
+    assert rollup_rows() == [
+        ("1996-07", 1, 1, "France", 2, 5, 50.0),
+        ("1996-07", 2, 1, "France", 1, 1, 10.0),
+    ]
+
+    order_service.update_order({"ship_country": "Germany"}, order["order_id"])
+
+    assert rollup_rows() == [
+        ("1996-07", 1, 1, "France", 1, 3, 30.0),
+        ("1996-07", 1, 1, "Germany", 1, 2, 20.0),
+        ("1996-07", 2, 1, "Germany", 1, 1, 10.0),
+    ]
+
+
+def test_rebuild_matches_the_incremental_rollup(products):
+    order_service.add_order({"order_date": "1996-07-04", "ship_via": 1,
+                             "details": [{"product_id": 1, "quantity": 2}]})
+    db.session.add_all([
+        Order(order_id=10, ship_via=1, employee_id=1, ship_country="UK", order_date=datetime(1997, 1, 2)),
+        OrderDetails(order_id=10, product_id=2, unit_price=20.0, quantity=4, discount=0.25),
+    ])
+    db.session.commit()
+    order_service.add_orders([{"order_id": 10, "order_date": "1997-02-03", "ship_via": 1, "employee_id": 1,
+                               "ship_country": "UK"}], upsert=True)
+    incremental = rollup_rows()
+
+    sales_rollup_service.rebuild()
+
+    assert rollup_rows() == incremental == [
+        ("1996-07", 1, 0, "", 1, 2, 20.0),
+        ("1997-02", 2, 1, "UK", 1, 4, 60.0),
+    ]
+
+
+def test_get_sales_reports_from_the_rollup(products, sqlite_app):
+    order_service.add_order({"order_date": "1996-07-04", "ship_via": 1, "employee_id": 1,
+                             "details": [{"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 1}]})
+
+    response = sqlite_app.test_client().get("/v1/reports/sales/products?month_from=1996-07")
+
+    assert response.json == [
+        {"product_id": 1, "product_name": "Chai", "order_lines": 1, "quantity": 2, "revenue": 20.0},
+        {"product_id": 2, "product_name": "Chang", "order_lines": 1, "quantity": 1, "revenue": 20.0},
+    ]
+    assert sales_rollup_service.get_sales("employees") == [
+        {"employee_id": 1, "first_name": "Nancy", "last_name": "Davolio", "order_lines": 2, "quantity": 3,
+         "revenue": 40.0}
+    ]
+
+
+def test_get_sales_fails_with_unknown_dimension_or_month():
+    with pytest.raises(ValidationException) as dimension_exc_info:
+        sales_rollup_service.get_sales("suppliers")
+    with pytest.raises(ValidationException) as month_exc_info:
+        sales_rollup_service.get_sales("months", month_from="July")
+
+    assert dimension_exc_info.value.msg == ("Invalid dimension suppliers, allowed dimensions are "
+                                            "months, products, categories, employees, countries")
+    assert month_exc_info.value.msg == "Invalid month_from July, it should be a month like 1997-01"
+
+
+def test_rebuild_command(products, sqlite_app):
+    result = sqlite_app.test_cli_runner().invoke(args=["rebuild-sales-rollups"])
+
+    assert result.output == "Rebuilt 0 sales rollup rows\n"
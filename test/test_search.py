@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from app import create_app, search
+from app.db import db
+from app.exceptions import ValidationException
+from app.models import Customer
+from app.search import SearchIndex, normalize
+from app.services import customer_service, product_service
+
+
+def test_normalize_drops_case_accents_and_punctuation():
+    assert normalize("Comércio  Mineiro, S.A.") == "comercio mineiro s a"
+
+
+def test_search_index_ranks_prefix_matches_first():
+    index = SearchIndex("product_id", ("product_name",))
+    index.add([
+        {"product_id": 1, "product_name": "Chai"},
+        {"product_id": 2, "product_name": "Chang"},
+        {"product_id": 3, "product_name": "Chartreuse verte"},
+        {"product_id": 4, "product_name": "Gustaf's Knäckebröd"},
+    ])
+
+    assert [doc["product_id"] for doc in index.search("cha", 10)] == [1, 2, 3]
+    assert [doc["product_id"] for doc in index.search("verte", 10)] == [3]
+    # misspelled, matched by trigram similarity
+    assert [doc["product_id"] for doc in index.search("knackebrot", 10)] == [4]
+
+    index.remove([1])
+
+    assert 1 not in [doc["product_id"] for doc in index.search("chai", 10)]
+
+
+def test_search_follows_customer_and_product_writes(sqlite_app):
+    db.session.add_all([
+        Customer(customer_id="ALFKI", company_name="Alfreds Futterkiste", contact_name="Maria Anders"),
+        Customer(customer_id="ANATR", company_name="Ana Trujillo Emparedados", contact_name="Ana Trujillo"),
+    ])
+    db.session.commit()
+
+    assert [doc["customer_id"] for doc in customer_service.search_customers("anabela")] == ["ANATR"]
+
+    customer_service.update_customer({"contact_name": "Anabela Domingues"}, "ALFKI")
+    customer_service.add_customer({"customer_id": "AROUT", "company_name": "Around the Horn"})
+    product_service.add_product({"product_name": "Chai", "quantity_per_unit": "10 boxes", "discontinued": 0})
+
+    assert [doc["customer_id"] for doc in customer_service.search_customers("anabela")] == ["ALFKI", "ANATR"]
+    assert customer_service.search_customers("around", "1") == [
+        {"customer_id": "AROUT", "company_name": "Around the Horn", "contact_name": None}
+    ]
+    assert [doc["product_name"] for doc in product_service.search_products("chai")] == ["Chai"]
+
+
+def test_search_endpoint_validates_the_query(sqlite_app):
+    client = sqlite_app.test_client()
+
+    missing = client.get("/v1/products/search")
+    invalid_limit = client.get("/v1/products/search?q=chai&limit=500")
+
+    assert missing.status_code == 400
+    assert missing.json == {"error": "Search query q is required"}
+    assert invalid_limit.json == {"error": "Invalid limit 500, limit should be a number from 1 to 50"}
+    with pytest.raises(ValidationException):
+        customer_service.search_customers("  ")
+
+
+def wait_for_rebuild(app, name):
+    while app.extensions["northwind_search"][name].rebuilding:
+        time.sleep(0.01)
+
+
+def test_expired_index_is_served_while_it_is_rebuilt(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'northwind.db'}", "SEARCH_INDEX_TTL": 0})
+    with app.app_context():
+        db.create_all()
+        db.session.add(Customer(customer_id="ALFKI", company_name="Alfreds Futterkiste"))
+        db.session.commit()
+        assert len(customer_service.search_customers("alfreds")) == 1
+        wait_for_rebuild(app, "customers")
+        # written by another process, only a rebuild finds it
+        db.session.add(Customer(customer_id="ALFRE", company_name="Alfreds Zwei"))
+        db.session.commit()
+
+        stale = customer_service.search_customers("alfreds")
+        wait_for_rebuild(app, "customers")
+
+        assert [doc["customer_id"] for doc in stale] == ["ALFKI"]
+        assert len(customer_service.search_customers("alfreds")) == 2
+
+
+def test_writes_made_during_a_rebuild_are_not_lost(sqlite_app, monkeypatch):
+    db.session.add(Customer(customer_id="ALFKI", company_name="Alfreds Futterkiste"))
+    db.session.commit()
+    customer_service.search_customers("alfreds")
+    entry = sqlite_app.extensions["northwind_search"]["customers"]
+    snapshot = search._documents("customers")
+    read_documents = search._documents
+
+    def documents_read_before_the_update(name, ids=None):
+        if ids is None:
+            return snapshot
+        return read_documents(name, ids)
+
+    monkeypatch.setattr(search, "_documents", documents_read_before_the_update)
+    entry.rebuilding = True
+    customer_service.update_customer({"company_name": "Renamed Futterkiste"}, "ALFKI")
+    search._build("customers", entry)
+
+    assert [doc["company_name"] for doc in customer_service.search_customers("renamed")] == ["Renamed Futterkiste"]
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.db import db
+from app.models import Category, Customer, Employee, Order, OrderDetails, Product, Shipper, Supplier
+from app.serializers import serialize, serializer_for
+
+
+@pytest.mark.parametrize("obj", [
+    Customer(customer_id="ALFKI", company_name="Alfreds Futterkiste", country="Germany"),
+    Employee(employee_id=1, last_name="Davolio", first_name="Nancy", birth_date=datetime(1948, 12, 8),
+             photo=b"photo", notes="notes"),
+    Category(category_id=1, category_name="Beverages", description="Soft drinks", picture=b"picture"),
+    Supplier(supplier_id=1, company_name="Exotic Liquids", city="London"),
+    Product(product_id=1, product_name="Chai", unit_price=18.0, discontinued=0),
+    Shipper(shipper_id=1, company_name="Speedy Express", phone="(503) 555-9831"),
+    Order(order_id=1, customer_id="ALFKI", ship_via=1, order_date=datetime(1996, 7, 4)),
+    OrderDetails(order_id=1, product_id=1, unit_price=18.0, quantity=2, discount=0.0),
+])
+def test_serializer_matches_to_dict(obj):
+    assert serialize(obj) == obj.to_dict()
+    assert list(serialize(obj)) == list(obj.to_dict())
+
+
+def test_serializer_is_generated_once_per_field_list():
+    assert serializer_for(Order) is serializer_for(Order)
+    assert serializer_for(Order, ("order_id",)) is not serializer_for(Order)
+
+
+def test_serializer_reads_core_rows(sqlite_app):
+    db.session.add(Product(product_id=1, product_name="Chai", quantity_per_unit="10 boxes", discontinued=1))
+    db.session.commit()
+    row = db.session.execute(select(Product.product_id, Product.discontinued)).one()
+
+    serializer = serializer_for(Product, ("product_id", "discontinued"), rows=True)
+
+    assert serializer(row) == {"product_id": 1, "discontinued": True}
+
+
+def test_serializer_refreshes_expired_attributes(sqlite_app):
+    db.session.add(Customer(customer_id="ALFKI", company_name="Alfreds Futterkiste"))
+    db.session.commit()
+    customer = db.session.get(Customer, "ALFKI")
+    db.session.expire(customer)
+
+    assert serialize(customer, ["company_name"]) == {"company_name": "Alfreds Futterkiste"}
+
+
+def test_json_provider_keeps_serializer_key_order(sqlite_app):
+    response = sqlite_app.json.response({"order_id": 1, "customer_id": "ALFKI"})
+
+    assert response.get_data() == b'{"order_id":1,"customer_id":"ALFKI"}\n'
+    assert sqlite_app.json.loads(response.get_data()) == {"order_id": 1, "customer_id": "ALFKI"}